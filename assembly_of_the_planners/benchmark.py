@@ -0,0 +1,108 @@
+# Fixed workloads for timing the Assembly solver, instead of timing runs by
+# feel. The timing, baseline and command line are in
+# common/benchmarking.py, shared with the Seventh Mountain's benchmark.
+# Every workload is deterministic: the same inputs and the same amount of
+# work on every run.
+
+import ast
+import os
+import tempfile
+
+import numpy as np
+
+import assembly_jewels_matrixgen
+import common_path  # puts common/ on the path, for benchmarking
+from benchmarking import main
+from draw_solution import draw_solution
+from pent_solver import iter_solutions, solve
+from placements import ASSEMBLY_PIECES, build_matrix, create_moves_matrix
+from svg_stream import SolutionRenderer
+
+
+def load_known_solution():
+    """The matrix in incidence_matrix_known_solution.json (written as
+    'solution = [...]', so not actually JSON)."""
+    with open("incidence_matrix_known_solution.json", encoding='utf8') as file:
+        return ast.literal_eval(file.read().split("=", 1)[1].strip())
+
+
+def sub_board(shape, names):
+    """The matrix for a plain rectangle and some of the Assembly pieces."""
+    pieces = [piece for piece in ASSEMBLY_PIECES if piece[0] in names]
+    return build_matrix(np.ones(shape, dtype=bool), pieces)
+
+
+def workloads(full=False):
+    """(name, setup) pairs. setup does any untimed preparation and returns
+    the function to time."""
+    def matrix_original():
+        return assembly_jewels_matrixgen.create_moves_matrix
+
+    def matrix_numpy():
+        return create_moves_matrix
+
+    def known_solution():
+        matrix = load_known_solution()
+        return lambda: solve(matrix)
+
+    def first_solution():
+        matrix = create_moves_matrix()
+        return lambda: next(iter_solutions(matrix))
+
+    def sub_board_4x10():
+        matrix = sub_board((4, 10), ["F_std", "F_ref", "P", "Z", "V", "N_ref",
+                                     "L", "U"])
+        return lambda: solve(matrix)
+
+    def sub_board_5x8():
+        matrix = sub_board((5, 8), ["F_std", "F_ref", "P", "Z", "V", "N_ref",
+                                    "U", "T"])
+        return lambda: solve(matrix)
+
+    def first_ten():
+        matrix = create_moves_matrix()
+        solutions = []
+        for solution in iter_solutions(matrix):
+            solutions.append(solution)
+            if (len(solutions) == 10):
+                break
+        return solutions
+
+    def render_svg():
+        solutions = first_ten()
+        filename = os.path.join(tempfile.gettempdir(), "benchmark.svg")
+        return lambda: draw_solution(solutions, filename, columns=5)
+
+    def stream_svg():
+        # what solve_assembly_of_planers.py draws with now; render_svg_10
+        # stays for comparison.
+        solutions = first_ten()
+        filename = os.path.join(tempfile.gettempdir(), "benchmark_stream.svg")
+
+        def run():
+            with SolutionRenderer(filename, columns=5) as renderer:
+                renderer.write_all(solutions)
+        return run
+
+    def all_solutions():
+        matrix = create_moves_matrix()
+        return lambda: solve(matrix)
+
+    found = [
+        ("matrix_original", matrix_original),
+        ("matrix_numpy", matrix_numpy),
+        ("known_solution", known_solution),
+        ("first_solution", first_solution),
+        ("sub_board_4x10", sub_board_4x10),
+        ("sub_board_5x8", sub_board_5x8),
+        ("render_svg_10", render_svg),
+        ("stream_svg_10", stream_svg),
+    ]
+    if (full):
+        found.append(("all_solutions", all_solutions))
+    return found
+
+
+if (__name__ == "__main__"):
+    main("Times fixed Assembly of the Planners workloads.", workloads,
+         "also time finding every solution to the full board (several seconds a run)")
@@ -0,0 +1,111 @@
+# Integer bitboards for the Assembly of the Planners board (or any other
+# board, given its list of squares).
+# Every legal square gets one bit, numbered in row-major order, so a
+# position of a piece is a single int and:
+# - two positions overlap when (a & b) != 0
+# - placing a piece on a board is board | mask
+# - taking it back off again is board ^ mask
+# The (i, j) tuple form used everywhere else (draw_solution, empty_grid) is
+# always available again through mask_to_placement / to_placements.
+
+from assembly_jewels_matrixgen import LEGAL_SPACES
+
+# the legal squares of LEGAL_SPACES, with the padding taken off so they use
+# the same coordinates as the incidence matrix and BOARD_LOCATIONS in
+# empty_grid.py.
+BOARD_CELLS = [(i - 1, j - 1)
+               for i, row in enumerate(LEGAL_SPACES)
+               for j, legal in enumerate(row) if legal == 1]
+
+FULL_BOARD = (1 << len(BOARD_CELLS)) - 1
+
+
+def cell_bits(cells=BOARD_CELLS):
+    """Returns a dictionary of square -> bit for the given squares."""
+    return {tuple(cell): 1 << n for n, cell in enumerate(cells)}
+
+
+def cells_of_matrix(all_pieces):
+    """Every square used by at least one position in the matrix, in
+    row-major order. For the full Assembly matrix this is BOARD_CELLS."""
+    return sorted({tuple(coord)
+                   for _, positions in all_pieces
+                   for position in positions
+                   for coord in position})
+
+
+def placement_to_mask(position, bits):
+    """Turns a list of (i, j) squares into its bitmask. bits is a lookup
+    from cell_bits."""
+    mask = 0
+    for coord in position:
+        mask |= bits[tuple(coord)]
+    return mask
+
+
+def mask_to_placement(mask, cells=BOARD_CELLS):
+    """Turns a bitmask back into the list of (i, j) squares it covers, in
+    row-major order."""
+    position = []
+    while mask:
+        low_bit = mask & -mask
+        position.append(cells[low_bit.bit_length() - 1])
+        mask ^= low_bit
+    return position
+
+
+def compile_matrix(all_pieces, cells=None):
+    """Precompiles every position of the (name, [positions]) matrix into a
+    mask. Returns the list of squares the bits refer to and the matrix in
+    (name, [masks]) form. cells defaults to every square the matrix uses."""
+    if (cells is None):
+        cells = cells_of_matrix(all_pieces)
+    bits = cell_bits(cells)
+    compiled = [(piece_name,
+                 [placement_to_mask(position, bits) for position in positions])
+                for piece_name, positions in all_pieces]
+    return cells, compiled
+
+
+def neighbour_masks(cells=BOARD_CELLS):
+    """For each bit, the mask of the squares directly above, below, left
+    and right of it that are on the board."""
+    bits = cell_bits(cells)
+    return [placement_to_mask([near for near in ((i - 1, j), (i + 1, j),
+                                                  (i, j - 1), (i, j + 1))
+                               if near in bits], bits)
+            for i, j in cells]
+
+
+def flood_fill(seed, empty, neighbours):
+    """The connected region of empty (a mask) containing the bits in seed,
+    using the neighbours list from neighbour_masks."""
+    region = seed
+    frontier = seed
+    while frontier:
+        low_bit = frontier & -frontier
+        frontier ^= low_bit
+        grow = neighbours[low_bit.bit_length() - 1] & empty & ~region
+        region |= grow
+        frontier |= grow
+    return region
+
+
+def check_valid(board, mask):
+    """True if the position in mask does not overlap anything on board."""
+    return board & mask == 0
+
+
+def to_placements(solution, cells=BOARD_CELLS):
+    """Converts a solution of (name, mask) pairs back to the (name, [(i, j)])
+    form expected by draw_solution and empty_grid.pretty."""
+    return [(piece_name, mask_to_placement(mask, cells))
+            for piece_name, mask in solution]
+
+
+def from_placements(solution, cells=BOARD_CELLS):
+    """Converts a (name, [(i, j)]) solution or partial board into
+    (name, mask) pairs."""
+    bits = cell_bits(cells)
+    return [(piece_name, placement_to_mask(position, bits))
+            for piece_name, position in solution]
@@ -0,0 +1,106 @@
+# Checkpoint/resume for long pent_solver runs. Every so often the search
+# writes out where it is: the rows chosen so far on the current path, the
+# index of each of those rows in its level's (sorted) list of options, and
+# how many solutions had been handed out by then. Everything before that
+# path in search order is done, so a resumed search walks straight back
+# down the path and carries on from there.
+# The solutions themselves are not kept in the checkpoint (that would make
+# memory grow with the solution count); they are whatever the caller wrote
+# out, e.g. the JSON Lines file from solution_io, cut back to the saved
+# count on resume.
+
+import hashlib
+import json
+import os
+import time
+
+
+def matrix_key(all_pieces, canonical=False):
+    """Fingerprint of a matrix and search mode, so a checkpoint is never
+    resumed against a different problem. A matrix_cache.CachedMatrix goes
+    by the key of what it was built from, without unpacking it."""
+    if (hasattr(all_pieces, "key")):
+        all_pieces = all_pieces.key
+    data = json.dumps([all_pieces, canonical], sort_keys=True)
+    return hashlib.sha1(data.encode('utf8')).hexdigest()
+
+
+class Checkpoint:
+    """Periodically saves the search frontier to filename (as JSON).
+
+    -- key: matrix_key of the problem being solved.
+    -- interval: seconds between saves.
+    -- on_save: optional function called just before each save, e.g. to
+        flush the file solutions are being written to, so that file always
+        holds at least as many solutions as the checkpoint says.
+
+    Call load() before searching to pick up an existing checkpoint."""
+
+    # the clock is only looked at every this many search nodes.
+    TICKS_PER_CHECK = 1024
+
+    def __init__(self, filename, key, interval=60, on_save=None):
+        self.filename = filename
+        self.key = key
+        self.interval = interval
+        self.on_save = on_save
+        self.found = 0
+        self.finished = False
+        # option index of each row on the current path, kept in step with
+        # partial by pent_solver.internal_solve.
+        self.indexes = []
+        self.resume_path = []
+        self._ticks = 0
+        self._last_save = time.monotonic()
+
+    def load(self):
+        """Reads the checkpoint file if there is one. Returns True if there
+        was something to resume from. Raises ValueError if the checkpoint
+        belongs to another matrix."""
+        if (not os.path.exists(self.filename)):
+            return False
+        with open(self.filename, encoding='utf8') as file:
+            state = json.load(file)
+        if (state["key"] != self.key):
+            raise ValueError("checkpoint {0} is for a different matrix"
+                             .format(self.filename))
+        self.found = state["found"]
+        self.finished = state["finished"]
+        self.resume_path = list(zip(state["path"], state["indexes"]))
+        return True
+
+    def resume_from(self, options):
+        """Called by the solver on the way back down the saved path with the
+        options at that level; returns the index to carry on from."""
+        row, index = self.resume_path.pop(0)
+        if (index >= len(options) or options[index] != row):
+            raise ValueError("checkpoint {0} does not match the search"
+                             .format(self.filename))
+        return index
+
+    def tick(self, partial):
+        """Called at every search node; saves once interval has passed."""
+        self._ticks += 1
+        if (self._ticks % self.TICKS_PER_CHECK == 0 and
+                time.monotonic() - self._last_save >= self.interval):
+            self.save(partial)
+
+    def save(self, partial):
+        if (self.on_save is not None):
+            self.on_save()
+        self._write({"key": self.key, "found": self.found,
+                     "finished": self.finished, "path": list(partial),
+                     "indexes": list(self.indexes)})
+        self._last_save = time.monotonic()
+
+    def finish(self):
+        """Marks the search as complete."""
+        self.finished = True
+        self.save([])
+
+    def _write(self, state):
+        # write then rename, so a kill mid-save leaves the old checkpoint.
+        temp_name = self.filename + ".tmp"
+        with open(temp_name, 'w', encoding='utf8') as file:
+            json.dump(state, file)
+        os.replace(temp_name, self.filename)
@@ -0,0 +1,11 @@
+# The modules in common/ (one directory up) are shared by both puzzles.
+# Importing this puts that directory on the path, so they can be imported
+# by name like anything in here, however the script was started.
+
+import os
+import sys
+
+COMMON = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "common")
+if (COMMON not in sys.path):
+    sys.path.append(COMMON)
@@ -0,0 +1,179 @@
+# Binary cache for incidence matrices, replacing the pprint text dumps
+# (incidence_matrix_assembly.json and friends, which aren't valid JSON and
+# can only be read back with eval).
+# File layout:
+#   8 bytes   magic, b"PENTMAT1"
+#   4 bytes   header length, little endian
+#   header    JSON: board shape, the board's squares (the bit order), each
+#             piece's name and number of positions, the number of 64 bit
+#             words per position, the key of the inputs and a hash of the
+#             data
+#   padding   up to a multiple of 64 bytes
+#   data      little endian uint64 array, one row of words per position, in
+#             piece order. Bit n of a row is square n of the board.
+# The data is memory mapped with numpy, so loading costs next to nothing
+# however big the matrix is, and pent_solver takes a CachedMatrix as it is
+# (see CachedMatrix.compiled), turning each row straight into a mask without
+# going through lists of squares. Files are named after a key made from the
+# board and the piece set, so a cached matrix is only rebuilt when one of
+# those changes; checking the data against its hash means reading all of
+# it, so that is only done when asked for.
+
+import hashlib
+import json
+import os
+import struct
+
+import numpy as np
+
+from bitboard import cell_bits, mask_to_placement, placement_to_mask
+from placements import board_cells, build_matrix, normalise
+
+MAGIC = b"PENTMAT1"
+ALIGNMENT = 64
+# bump when the layout or build_matrix's output changes, so old caches
+# are not trusted.
+FORMAT_VERSION = 1
+
+
+def inputs_key(board, pieces, trim_dead=True):
+    """Hash of everything build_matrix's output depends on."""
+    board = np.asarray(board, dtype=bool)
+    digest = hashlib.sha1()
+    digest.update(json.dumps([FORMAT_VERSION, list(board.shape), trim_dead,
+                              [[name, normalise(shape), reflect]
+                               for name, shape, reflect in pieces]])
+                  .encode('utf8'))
+    digest.update(np.packbits(board).tobytes())
+    return digest.hexdigest()
+
+
+class CachedMatrix:
+    """An incidence matrix loaded from the cache. masks is the memory
+    mapped (positions x words) uint64 array; piece_rows gives each piece
+    name with its slice of rows in masks; key is the key of the inputs it
+    was built from.
+
+    pent_solver's iter_solutions, solve, first, exists and count,
+    parallel_solver.solve_parallel and transposition's counting all take
+    one of these in place of a (name, [positions]) matrix and use its masks
+    as they are. A canonical search also unpacks it into squares for the
+    symmetry.Canonicaliser. Anything else (symmetry.expand_solutions,
+    partial.PartialPosition, ...) wants to_matrix()."""
+
+    def __init__(self, header, masks):
+        self.header = header
+        self.masks = masks
+        self.board_shape = tuple(header["board_shape"])
+        self.cells = [tuple(cell) for cell in header["cells"]]
+        self.key = header["key"]
+        self._compiled = None
+        self.piece_rows = []
+        start = 0
+        for name, count in header["pieces"]:
+            self.piece_rows.append((name, slice(start, start + count)))
+            start += count
+
+    def row_mask(self, row):
+        """Position number row as a Python int bitmask."""
+        mask = 0
+        for n, word in enumerate(self.masks[row].tolist()):
+            mask |= word << (64 * n)
+        return mask
+
+    def compiled(self):
+        """The matrix in bitboard.compile_matrix's (name, [masks]) form,
+        with bit n being square n of cells. Worked out on the first call,
+        straight from the bytes of each row."""
+        if (self._compiled is None):
+            data = self.masks.tobytes()
+            size = 8 * self.header["words"]
+            self._compiled = [
+                (name, [int.from_bytes(data[row * size:(row + 1) * size],
+                                       'little')
+                        for row in range(rows.start, rows.stop)])
+                for name, rows in self.piece_rows]
+        return self._compiled
+
+    def to_matrix(self):
+        """The matrix in the usual (name, [positions]) form."""
+        return [(name, [mask_to_placement(mask, self.cells)
+                        for mask in masks])
+                for name, masks in self.compiled()]
+
+
+def write_matrix(filename, board, matrix, key):
+    """Writes a (name, [positions]) matrix for the given board array to
+    filename in the cache format."""
+    cells = board_cells(board)
+    bits = cell_bits(cells)
+    words = max(1, (len(cells) + 63) // 64)
+    rows = [placement_to_mask(position, bits)
+            for _, positions in matrix for position in positions]
+    data = np.zeros((len(rows), words), dtype='<u8')
+    for n, mask in enumerate(rows):
+        for word in range(words):
+            data[n, word] = (mask >> (64 * word)) & 0xFFFFFFFFFFFFFFFF
+    header = json.dumps({
+        "board_shape": list(np.shape(board)),
+        "cells": cells,
+        "pieces": [[name, len(positions)] for name, positions in matrix],
+        "words": words,
+        "key": key,
+        "content_hash": hashlib.sha1(data.tobytes()).hexdigest(),
+    }).encode('utf8')
+    preamble = len(MAGIC) + 4 + len(header)
+    padding = -preamble % ALIGNMENT
+    # write then rename, so a half written cache file is never picked up.
+    temp_name = filename + ".tmp"
+    with open(temp_name, 'wb') as file:
+        file.write(MAGIC)
+        file.write(struct.pack('<I', len(header)))
+        file.write(header)
+        file.write(b"\0" * padding)
+        file.write(data.tobytes())
+    os.replace(temp_name, filename)
+
+
+def read_matrix(filename, verify=False):
+    """Memory maps a cache file. Returns a CachedMatrix, or raises
+    ValueError if the file isn't one. verify also checks the data against
+    the content hash (which means reading all of it)."""
+    with open(filename, 'rb') as file:
+        if (file.read(len(MAGIC)) != MAGIC):
+            raise ValueError("{0} is not a matrix cache file".format(filename))
+        header_length, = struct.unpack('<I', file.read(4))
+        header = json.loads(file.read(header_length).decode('utf8'))
+    offset = len(MAGIC) + 4 + header_length
+    offset += -offset % ALIGNMENT
+    count = sum(pieces for _, pieces in header["pieces"])
+    if (count == 0):
+        masks = np.zeros((0, header["words"]), dtype='<u8')
+    else:
+        masks = np.memmap(filename, dtype='<u8', mode='r', offset=offset,
+                          shape=(count, header["words"]))
+    if (verify and hashlib.sha1(masks.tobytes()).hexdigest() !=
+            header["content_hash"]):
+        raise ValueError("{0} is corrupt".format(filename))
+    return CachedMatrix(header, masks)
+
+
+def load_or_build(board, pieces, directory=".", trim_dead=True,
+                  verify=False):
+    """The matrix for this board and piece set (as for
+    placements.build_matrix), from the cache in directory if it is there
+    and was built from the same inputs, otherwise built and cached. verify
+    checks a cached file's content hash too, rebuilding it if it is
+    corrupt."""
+    key = inputs_key(board, pieces, trim_dead)
+    filename = os.path.join(directory, "matrix_{0}.pmat".format(key[:16]))
+    if (os.path.exists(filename)):
+        try:
+            cached = read_matrix(filename, verify)
+            if (cached.header["key"] == key):
+                return cached
+        except ValueError:
+            pass
+    write_matrix(filename, board, build_matrix(board, pieces, trim_dead),
+                 key)
+    return read_matrix(filename)
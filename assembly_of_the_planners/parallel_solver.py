@@ -0,0 +1,88 @@
+# Runs pent_solver on every core. The top one or two levels of the search
+# tree are split off into independent subproblems (see
+# pent_solver.split_search), which are handed to a process pool. Each worker
+# builds its own Algorithm X structure once and then solves whichever
+# subproblems it is given.
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from bitboard import to_placements
+from pent_solver import (build_columns, make_pruner, prepare, split_search,
+                         solve_from)
+
+# set up in each worker process by _init_worker.
+_worker_columns = None
+_worker_siblings = None
+_worker_pruner = None
+
+
+def _init_worker(cells, compiled_pieces, siblings, prune):
+    global _worker_columns, _worker_siblings, _worker_pruner
+    _worker_columns = build_columns(compiled_pieces)
+    _worker_siblings = siblings
+    _worker_pruner = make_pruner(prune, cells, compiled_pieces)
+
+
+def _solve_subproblem(prefix):
+    X, Y, rows = _worker_columns
+    return list(solve_from(X, Y, rows, prefix, _worker_siblings,
+                           _worker_pruner))
+
+
+def solve_parallel(all_pieces, workers=None, split_depth=2,
+                   on_solutions=None, canonical=False, prune=True):
+    """Same as pent_solver.solve, but spread over a pool of worker processes.
+
+    -- workers: number of processes, defaults to the number of cores.
+    -- split_depth: how many piece levels to split the tree at before
+        handing out subproblems. 2 gives a few hundred subproblems for the
+        Assembly board, enough to keep every core busy.
+    -- on_solutions: optional function called with each batch of solutions
+        (already in (name, [(i, j)]) form) as soon as it and every
+        subproblem before it have finished, so the batches come out in
+        the same order as pent_solver.solve would give them. Only the
+        batches that finish ahead of one still running are held on to.
+    -- canonical, prune: as for pent_solver.solve (prune only as True or
+        False, each worker makes its own pruner).
+
+    Without on_solutions, returns a list identical to pent_solver.solve, in
+    the same order, no matter how many workers are used. With it, the
+    solutions are only handed to on_solutions and None is returned."""
+    if (workers is None):
+        workers = os.cpu_count() or 1
+    cells, compiled, canonicaliser, siblings = prepare(all_pieces, canonical)
+    X, Y, rows = build_columns(compiled)
+    prefixes = split_search(X, Y, rows, split_depth, siblings,
+                            make_pruner(bool(prune), cells, compiled))
+
+    # subproblem number -> its batch, for those that finished out of order
+    # (or all of them, when there's nowhere to stream them to).
+    results = {}
+    # the first subproblem whose batch hasn't been handed to on_solutions
+    next_out = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(cells, compiled, siblings,
+                                       bool(prune))) as pool:
+        futures = {pool.submit(_solve_subproblem, prefix): n
+                   for n, prefix in enumerate(prefixes)}
+        for future in as_completed(futures):
+            # drop the future as well, it holds on to the raw result
+            n = futures.pop(future)
+            solutions = [to_placements(solution, cells)
+                         for solution in future.result()]
+            if (canonicaliser is not None):
+                solutions = [solution for solution in solutions
+                             if canonicaliser.is_canonical(solution)]
+            results[n] = solutions
+            if (on_solutions is None):
+                continue
+            while (next_out in results):
+                batch = results.pop(next_out)
+                if (batch):
+                    on_solutions(batch)
+                next_out += 1
+
+    if (on_solutions is not None):
+        return None
+    return [solution for n in range(len(prefixes)) for solution in results[n]]
@@ -0,0 +1,149 @@
+# Finishing a partly filled Assembly board, like the positions in
+# demonstrations_lp/Demonstrations.py. The pieces already down are checked
+# (real pieces, each used once, every square on the board, no overlaps, and
+# each in a position the piece can really take), then taken out of the
+# matrix along with every position that clashes with them, and whatever is
+# left is solved as usual. Deciding whether a position can be finished at
+# all goes through the counting search in transposition.py, which takes a
+# few milliseconds.
+
+import argparse
+
+from bitboard import BOARD_CELLS, cell_bits, check_valid, from_placements, \
+    mask_to_placement, placement_to_mask
+from pent_solver import count, exists, first, solve
+from placements import ASSEMBLY_BOARD, ASSEMBLY_PIECES, build_matrix
+from solution_io import read_solutions
+
+
+def assembly_matrix():
+    """The Assembly matrix with every position in, dead ends included."""
+    return build_matrix(ASSEMBLY_BOARD, ASSEMBLY_PIECES, trim_dead=False)
+
+
+class PartialPosition:
+    """A partial board: a list of (piece name, [(i, j)]) pieces already
+    placed, in the same form as a solution.
+
+    -- all_pieces: the full (name, [positions]) matrix for the board. It
+        should be untrimmed (see assembly_matrix), or a piece put somewhere
+        that walls off a dead region is reported as not fitting there
+        rather than as a position that can't be finished.
+    -- board: the board's squares. BOARD_CELLS is the Assembly board (the
+        same squares as BOARD_LOCATIONS in demonstrations_lp/empty_grid.py).
+    -- ignore_off_board: leave out pieces lying entirely off the board,
+        like the pieces put aside in demonstration 4, instead of treating
+        them as a mistake. They are still available to place.
+
+    Raises ValueError, saying what is wrong, for a position that isn't
+    legal."""
+
+    def __init__(self, placed, all_pieces, board=BOARD_CELLS,
+                 ignore_off_board=False):
+        cells = sorted(board)
+        board = set(cells)
+        bits = cell_bits(cells)
+        positions = {piece_name: {frozenset(map(tuple, position))
+                                  for position in piece_positions}
+                     for piece_name, piece_positions in all_pieces}
+        on_board = []
+        for piece_name, squares in placed:
+            squares = [tuple(square) for square in squares]
+            if (ignore_off_board and not board.intersection(squares)):
+                continue
+            if (piece_name not in positions):
+                raise ValueError("unknown piece {0}".format(piece_name))
+            if (any(name == piece_name for name, _ in on_board)):
+                raise ValueError("{0} is placed twice".format(piece_name))
+            off_board = [square for square in squares if square not in board]
+            if (off_board):
+                raise ValueError("{0} is off the board at {1}".format(
+                    piece_name, off_board))
+            on_board.append((piece_name, squares))
+
+        self.placed = []
+        covered = 0
+        for (piece_name, squares), (_, mask) in zip(
+                on_board, from_placements(on_board, cells)):
+            if (not check_valid(covered, mask)):
+                raise ValueError("{0} overlaps another piece at {1}".format(
+                    piece_name, mask_to_placement(covered & mask, cells)))
+            if (frozenset(squares) not in positions[piece_name]):
+                raise ValueError("{0} can't be placed at {1}".format(
+                    piece_name, sorted(squares)))
+            covered |= mask
+            self.placed.append((piece_name, sorted(squares)))
+
+        used = {piece_name for piece_name, _ in self.placed}
+        self.empty = set(mask_to_placement(
+            ((1 << len(cells)) - 1) & ~covered, cells))
+        self.matrix = [(piece_name,
+                        [position for position in piece_positions
+                         if check_valid(covered,
+                                        placement_to_mask(position, bits))])
+                       for piece_name, piece_positions in all_pieces
+                       if piece_name not in used]
+        self.order = [piece_name for piece_name, _ in all_pieces]
+
+    def possible(self):
+        """False if some empty square can't be reached by any position left
+        (which the solver, only knowing about squares some position uses,
+        wouldn't notice by itself)."""
+        reachable = {tuple(square) for _, piece_positions in self.matrix
+                     for position in piece_positions for square in position}
+        return reachable == self.empty
+
+    def completable(self):
+        """True if the position can be finished."""
+        if (not self.matrix):
+            return not self.empty
+        return self.possible() and exists(self.matrix)
+
+    def count(self):
+        """How many ways there are to finish the position."""
+        if (not self.matrix):
+            return 0 if self.empty else 1
+        return count(self.matrix) if self.possible() else 0
+
+    def completions(self, k=None):
+        """Full solutions (placed pieces plus the rest, in matrix order)
+        finishing the position, all of them or just the first k."""
+        if (not self.matrix):
+            return [] if self.empty else [self._merge([])]
+        if (not self.possible()):
+            return []
+        found = solve(self.matrix) if k is None else first(self.matrix, k)
+        return [self._merge(rest) for rest in found]
+
+    def _merge(self, rest):
+        pieces = dict(self.placed)
+        pieces.update(rest)
+        return [(piece_name, pieces[piece_name]) for piece_name in self.order
+                if piece_name in pieces]
+
+
+if (__name__ == "__main__"):
+    parser = argparse.ArgumentParser(
+        description="Checks partly filled Assembly boards, one per line of a "
+                    "JSON Lines file in the same form as the solutions file.")
+    parser.add_argument("positions", help="JSON Lines file of positions")
+    parser.add_argument("--count", action="store_true",
+                        help="also count the ways to finish each one")
+    parser.add_argument("--ignore-off-board", action="store_true",
+                        help="leave out pieces put entirely off the board")
+    args = parser.parse_args()
+
+    all_pieces = assembly_matrix()
+    for number, placed in enumerate(read_solutions(args.positions)):
+        try:
+            position = PartialPosition(placed, all_pieces,
+                                       ignore_off_board=args.ignore_off_board)
+        except ValueError as error:
+            print("{0}: invalid, {1}".format(number, error))
+            continue
+        if (args.count):
+            print("{0}: {1} ways to finish".format(number, position.count()))
+        else:
+            print("{0}: {1}".format(number, "can be finished"
+                                    if position.completable()
+                                    else "can't be finished"))
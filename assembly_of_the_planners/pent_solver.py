@@ -23,84 +23,344 @@
 # |------ Position (A list of tuples, first element is ith row and second
 #         is jth column)
 #
+# The matrix is turned into the usual Algorithm X structure (see
+# http://garethrees.org/2015/11/09/exact-cover/, same place draw_solution
+# came from):
+# X: column -> set of rows that have a 1 in that column. Columns are
+#    numbers: the squares are their bit numbers (see bitboard.py) and the
+#    pieces are -1, -2, ... in matrix order.
+# Y: row -> list of columns it has a 1 in. A row is one position of one
+#    piece, stored as a bitmask.
+# Covering a column removes every row that clashes with the chosen one from
+# the other columns, which is the 'dancing' part of dancing links done with
+# sets instead of pointers. The squares taken so far are carried along as a
+# single int board.
 
-# infinite_check = []
-from copy import deepcopy
+from itertools import islice
+from math import factorial, prod
 
+from bitboard import cells_of_matrix, compile_matrix, to_placements
+from pruning import RegionPruner
+from regions import RegionSplitter
+from symmetry import Canonicaliser, out_of_order_rows, sibling_rows
 
-def solve(all_pieces):
+
+def iter_solutions(all_pieces, canonical=False, checkpoint=None, prune=True,
+        stats=None, decompose=False):
+    """Generator version of solve. Yields each solution, in the same form
+    and order as solve returns them, as soon as it is found, so nothing
+    accumulates in memory and a consumer can stop whenever it likes.
+    checkpoint is an optional checkpoint.Checkpoint; the search saves its
+    position to it as it goes and, if it was loaded from an earlier run,
+    picks up where that left off (yielding only the solutions after the
+    ones that run had already handed out).
+    prune can be a pruning.RegionPruner (to look at its counts afterwards),
+    True to use a fresh one, or False to switch dead region pruning off.
+    stats is an optional search_stats.SearchStats to count and time the
+    search with.
+    decompose solves the board region by region once it splits up (see
+    regions.py). The solutions are the same but come out in a different
+    order, so it can't be combined with a checkpoint."""
+    if (checkpoint is not None and checkpoint.finished):
+        return
+    if (checkpoint is not None and decompose):
+        raise ValueError("decompose can't be used with a checkpoint")
+    cells, compiled, canonicaliser, siblings = prepare(all_pieces, canonical)
+    pruner = make_pruner(prune, cells, compiled)
+    X, Y, rows = build_columns(compiled)
+    splitter = RegionSplitter(cells, rows, Y, siblings) if decompose else None
+    for solution in internal_solve(X, Y, rows, [], 0, siblings, checkpoint,
+                                   pruner, stats, splitter):
+        solution = to_placements(solution, cells)
+        if (canonicaliser is None or canonicaliser.is_canonical(solution)):
+            if (checkpoint is not None):
+                checkpoint.found += 1
+            yield solution
+    if (checkpoint is not None):
+        checkpoint.finish()
+
+
+def solve(all_pieces, canonical=False, prune=True, stats=None,
+        decompose=False):
     """Solves the pentomino packing problem.
     One of each piece in valid_positions is placed on the board using one
-    of the provided positions such that no two pieces overlap at any point.
-    This does NOT check if there are empty squares, because if every piece
-    is placed without overlap, there shouldn't be any empty squares.
-    Returns a list of pieces and positions (tuple of piece name and a list
-    itself containing 5 tuples indicating square positions of the piece),
-    or none if there are no solutions.
-    Algorithm ends when it has exhausted every possible solution. Due to
-    this, it is recommend to trim the all_pieces matrix such that positions
-    that already obviously cause unwinnable scenarios are simply not present"""
-
-    solutions = []
-    internal_solve([], all_pieces, [], solutions)
-    return solutions
-
-
-def internal_solve(current_board, remaining_pieces, placed_pieces,
-        solution_accumulator):
-    """Attempts to place one piece, then calls itself for the remaining.
-    If it cannot place the piece, returns null to signify no solution.
-    Otherwise, will return the location it placed the piece appended
-    to the list of locations all future pieces were added to. This
-    recursion stops when a piece is placed, and no remaining pieces remain.
-
-    -- current_board: list of tuples indicating positions already taken up
-        by 'some' piece.
-    -- piece_name: the name of the piece being placed here. Intended to
-        allow the returned solutions to address it by name.
-    -- positions: a list of valid positions the piece can go on the given
-        board. These valid positions indicate places it could fit anywhere
-        on the board without regard to other piece placements. Typically,
-        this list is autogenerated and few to this algorithm.
-    -- remaining_pieces: the list of all pieces still yet to be placed, and
-        all their valid positions they could be placed in. When internal_solve
-        is called within, the current piece and positions are removed from
-        this list after being placed. Recursion ends when the last piece is
-        placed and this is therefore empty."""
-    piece_name, positions = remaining_pieces[0]
-    new_remaining = remaining_pieces[1:]
-
-    for position in positions:
-        if (check_valid(current_board, position)):
-            new_board = list(current_board)
-            for coord in position:
-                new_board.append(coord)
-
-            # if ((piece_name, position, current_board) in infinite_check):
-            #     raise RuntimeError("Already attempted to place {0} at {1}".
-            #         format(piece_name, position))
-            # infinite_check.append((piece_name, position, current_board))
-            # print("placed {0} at {1}".format(piece_name, position))
-
-            if (len(new_remaining) == 0):
-                return (piece_name, position)
-
-            placed_pieces_new = placed_pieces + [(piece_name, position)]
-            result = internal_solve(new_board, new_remaining,
-                placed_pieces_new, solution_accumulator)
-
-            # A solution was found.
-            if (result is not None):
-                solution_accumulator.append(placed_pieces_new + [result])
-
-    # gone through all positions; nothing more to do at this depth.
-    return None
-
-
-def check_valid(current_board, position):
-    """checks if the current board (list of taken up i, j squares) can taken
-    a piece at the given position."""
-    for coord in position:
-        if (coord in current_board):
-            return False
-    return True
+    of the provided positions such that no two pieces overlap at any point
+    and every square that appears in some position is covered.
+    Returns a list of solutions, each a list of pieces and positions (tuple
+    of piece name and a list itself containing 5 tuples indicating square
+    positions of the piece) in the same piece order as all_pieces. The list
+    is empty if there are no solutions.
+    Algorithm ends when it has exhausted every possible solution. Trimming
+    the all_pieces matrix of positions that obviously cause unwinnable
+    scenarios still helps, but is no longer required for it to finish in
+    reasonable time.
+    With canonical set, only one solution out of each family of symmetric
+    ones is returned (see symmetry.py): N_std_1 and N_std_2 are never just
+    swapped over, and rotations/reflections of the board are skipped when
+    the board has any. symmetry.expand_solutions gives back the full set.
+    prune switches off (or hands in) the dead region pruning, stats
+    collects search statistics and decompose solves separate regions of
+    the board independently, see iter_solutions."""
+
+    return list(iter_solutions(all_pieces, canonical, prune=prune,
+                               stats=stats, decompose=decompose))
+
+
+def first(all_pieces, k=1, canonical=False, prune=True):
+    """Up to k solutions, in the order solve would give them, stopping the
+    search as soon as it has them."""
+    return list(islice(iter_solutions(all_pieces, canonical, prune=prune), k))
+
+
+def exists(all_pieces, prune=True):
+    """True if there is at least one solution. Runs the usual search and
+    stops at the first solution it finds."""
+    return next(iter_solutions(all_pieces, prune=prune), None) is not None
+
+
+def count(all_pieces, canonical=False, prune=True, table=None):
+    """The number of solutions solve would return, without building any of
+    them where possible.
+    Every solution is counted with the transposition table (see
+    transposition.py). For a canonical count of a board with no symmetry
+    that is just divided by the number of ways to swap the interchangeable
+    pieces round; a board with symmetries has each solution checked by the
+    Canonicaliser instead, one at a time.
+    table is the transposition.TranspositionTable to count with, to set
+    its size limit (TranspositionTable(max_entries)) or look at its hit
+    rate afterwards; by default a fresh one with the default limit."""
+    # here rather than at the top, since transposition builds on this
+    # module's search.
+    from transposition import count_solutions
+    if (not canonical):
+        return count_solutions(all_pieces, table, prune)
+    # the Canonicaliser works on squares, so a CachedMatrix is unpacked
+    # for it (the counting itself still uses the masks).
+    canonicaliser = Canonicaliser(all_pieces.to_matrix()
+                                  if hasattr(all_pieces, "compiled")
+                                  else all_pieces)
+    if (not canonicaliser.symmetries):
+        return count_solutions(all_pieces, table, prune) // prod(
+            factorial(len(names)) for names in canonicaliser.groups)
+    return sum(1 for _ in iter_solutions(all_pieces, True, prune=prune))
+
+
+def prepare(all_pieces, canonical):
+    """Compiles the matrix for searching. Returns the squares the bitmasks
+    refer to, the compiled matrix, and the Canonicaliser and sibling rows
+    needed for a canonical search (both None when not canonical).
+    all_pieces can also be a matrix_cache.CachedMatrix, whose rows are
+    already masks; a canonical search still needs it as positions."""
+    if (hasattr(all_pieces, "compiled")):
+        if (not canonical):
+            return all_pieces.cells, all_pieces.compiled(), None, None
+        all_pieces = all_pieces.to_matrix()
+    cells = cells_of_matrix(all_pieces)
+    canonicaliser = None
+    siblings = None
+    if (canonical):
+        canonicaliser = Canonicaliser(all_pieces)
+        all_pieces = canonicaliser.trim_matrix(all_pieces)
+        siblings = sibling_rows(all_pieces, canonicaliser.groups)
+    _, compiled = compile_matrix(all_pieces, cells)
+    return cells, compiled, canonicaliser, siblings
+
+
+def make_pruner(prune, cells, compiled):
+    """The RegionPruner to search with, from the prune argument of
+    iter_solutions: a pruner is used as is, True makes one, False gives
+    None for no pruning."""
+    if (prune is True):
+        return RegionPruner(cells, compiled)
+    return prune or None
+
+
+def build_columns(compiled_pieces):
+    """Builds the X and Y dictionaries for Algorithm X from the incidence
+    matrix, already compiled to (name, [masks]) by bitboard.compile_matrix.
+    Rows are numbered in the order they appear in the matrix, and rows[n]
+    gives back the (piece name, mask) for row n."""
+    rows = []
+    Y = {}
+    for number, (piece_name, masks) in enumerate(compiled_pieces):
+        for mask in masks:
+            Y[len(rows)] = [piece_column(number)] + mask_bits(mask)
+            rows.append((piece_name, mask))
+
+    # every piece gets a column even if it has no positions at all, so that
+    # such a matrix correctly has no solutions.
+    X = {piece_column(number): set() for number in range(len(compiled_pieces))}
+    for row, columns in Y.items():
+        for column in columns:
+            X.setdefault(column, set()).add(row)
+    return X, Y, rows
+
+
+def piece_column(number):
+    """The column for the piece at the given index of the matrix."""
+    return -(number + 1)
+
+
+def choose_column(X):
+    """The column with fewest rows left. Ties go to the lowest column
+    number, so the choice never depends on the order X happens to be in
+    and a search always walks the same tree (split_search and checkpoints
+    rely on that)."""
+    return min(X, key=lambda c: (len(X[c]), c))
+
+
+def mask_bits(mask):
+    """The bit numbers set in mask, lowest first."""
+    return [n for n in range(mask.bit_length()) if (mask >> n) & 1]
+
+
+def internal_solve(X, Y, rows, partial, board, siblings=None,
+        checkpoint=None, pruner=None, stats=None, splitter=None):
+    """Picks the column with the fewest remaining rows, tries every one of
+    those rows in turn and calls itself for the smaller problem that is
+    left. When no columns remain, partial holds a full solution which is
+    yielded as a list of (piece name, mask) in matrix order.
+
+    -- X, Y: the Algorithm X structures from build_columns. They are
+        modified while searching but are restored before returning.
+    -- rows: row number to (piece name, mask) lookup.
+    -- partial: list of row numbers chosen so far.
+    -- board: bitmask of the squares covered by partial.
+    -- siblings: rows of interchangeable pieces, from symmetry.sibling_rows,
+        which are kept in position order. None to allow any order.
+    -- checkpoint: optional checkpoint.Checkpoint to save the search
+        position to, and resume from.
+    -- pruner: optional pruning.RegionPruner. Placements that wall off a
+        region that can't be filled are skipped without searching them.
+    -- stats: optional search_stats.SearchStats, told about every node,
+        pruned placement and solution.
+    -- splitter: optional regions.RegionSplitter. Once the empty squares
+        fall apart into separate regions, the rest is solved region by
+        region by it instead (which changes the order solutions come out
+        in, so it can't be used with a checkpoint)."""
+    if (checkpoint is not None):
+        checkpoint.tick(partial)
+    if (stats is not None):
+        depth = len(partial)
+        stats.enter(depth)
+    # leave in a finally, so a generator closed early (first(), --first)
+    # still finishes off the timing of every node it was in.
+    try:
+        if (not X):
+            if (stats is not None):
+                stats.solution(depth)
+            yield [rows[row] for row in sorted(partial)]
+            return
+        if (splitter is not None):
+            regions = splitter.regions(board)
+            if (len(regions) > 1):
+                for rest in splitter.solve(X, regions):
+                    if (stats is not None):
+                        stats.solution(depth)
+                    yield [rows[row] for row in sorted(partial + rest)]
+                return
+
+        # a column with no rows left ends this branch straight away.
+        column = choose_column(X)
+        options = sorted(X[column])
+        start = 0
+        if (checkpoint is not None):
+            if (checkpoint.resume_path):
+                start = checkpoint.resume_from(options)
+            checkpoint.indexes.append(start)
+        for index in range(start, len(options)):
+            row = options[index]
+            if (checkpoint is not None):
+                checkpoint.indexes[-1] = index
+            mask = rows[row][1]
+            if (pruner is not None and pruner.is_dead(board, mask)):
+                if (stats is not None):
+                    stats.prune(depth)
+                continue
+            partial.append(row)
+            removed = select(X, Y, row, siblings)
+            yield from internal_solve(X, Y, rows, partial, board | mask,
+                siblings, checkpoint, pruner, stats, splitter)
+            deselect(X, Y, row, removed)
+            partial.pop()
+        if (checkpoint is not None):
+            checkpoint.indexes.pop()
+    finally:
+        if (stats is not None):
+            stats.leave(depth)
+
+
+def split_search(X, Y, rows, depth, siblings=None, pruner=None, partial=None,
+        board=0):
+    """Splits the search tree into independent subproblems by walking the
+    first depth levels exactly as internal_solve would. Returns the list of
+    row prefixes in the order internal_solve visits them, so solving every
+    prefix in turn with solve_from gives the same solutions in the same
+    order as one internal_solve call."""
+    if (partial is None):
+        partial = []
+    if (depth == 0 or not X):
+        return [list(partial)]
+    prefixes = []
+    column = choose_column(X)
+    for row in sorted(X[column]):
+        mask = rows[row][1]
+        if (pruner is not None and pruner.is_dead(board, mask)):
+            continue
+        partial.append(row)
+        removed = select(X, Y, row, siblings)
+        prefixes.extend(split_search(X, Y, rows, depth - 1, siblings, pruner,
+                                     partial, board | mask))
+        deselect(X, Y, row, removed)
+        partial.pop()
+    return prefixes
+
+
+def solve_from(X, Y, rows, prefix, siblings=None, pruner=None, stats=None):
+    """Places the rows of prefix (from split_search) and then yields every
+    solution in the rest of the tree under them. X and Y are restored once
+    the generator is used up."""
+    board = 0
+    removed = []
+    for row in prefix:
+        removed.append(select(X, Y, row, siblings))
+        board |= rows[row][1]
+    yield from internal_solve(X, Y, rows, list(prefix), board, siblings,
+                              pruner=pruner, stats=stats)
+    for row in reversed(prefix):
+        deselect(X, Y, row, removed.pop())
+
+
+def select(X, Y, row, siblings=None):
+    """Covers every column of the given row, removing all clashing rows
+    from the rest of the structure. If row belongs to an interchangeable
+    piece, the twins' rows that would now be out of order are removed too.
+    Returns what was removed so that deselect can put it back."""
+    removed = []
+    for j in Y[row]:
+        for i in X[j]:
+            for k in Y[i]:
+                if (k != j):
+                    X[k].remove(i)
+        removed.append(X.pop(j))
+    dropped = []
+    if (siblings and row in siblings):
+        dropped = out_of_order_rows(X, row, siblings)
+        for i in dropped:
+            for k in Y[i]:
+                X[k].remove(i)
+    removed.append(dropped)
+    return removed
+
+
+def deselect(X, Y, row, removed):
+    """Undoes select, in exactly the reverse order."""
+    for i in removed.pop():
+        for k in Y[i]:
+            X[k].add(i)
+    for j in reversed(Y[row]):
+        X[j] = removed.pop()
+        for i in X[j]:
+            for k in Y[i]:
+                if (k != j):
+                    X[k].add(i)
@@ -0,0 +1,156 @@
+# Vectorised placement generation for polyomino boards, as a faster and more
+# general replacement for generate_all_moves in assembly_jewels_matrixgen.
+# - The board is a 2D array of 0/1 (or bool), 1 for squares that can be
+#   covered, with no padding needed.
+# - A piece is given once, as a list of (i, j) squares in any orientation;
+#   every distinct rotation (and reflection, if the piece is allowed to be
+#   flipped) is worked out from that.
+# - Each orientation is turned into a small mask and slid over the board in
+#   one go with numpy, so every legal translation is found at once rather
+#   than one Python check per translation.
+# The result is the same (name, [positions]) matrix create_moves_matrix
+# builds, so it feeds straight into pent_solver.
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from assembly_jewels_matrixgen import (LEGAL_SPACES, f_std_0, f_ref_0, p_0,
+                                       z_0, v_0, n_std_0, n_ref_0, l_0,
+                                       u_0, w_0, t_0)
+from bitboard import cell_bits, flood_fill, neighbour_masks, placement_to_mask
+
+# the Assembly board without the padding, so array indices are the same as
+# the coordinates used in the matrix.
+ASSEMBLY_BOARD = np.array(LEGAL_SPACES, dtype=bool)[1:, 1:]
+
+# (name, shape, may be reflected) for every piece in the Assembly puzzle.
+# None of them can be flipped over: the F's and N's come in both hands as
+# separate pieces instead.
+ASSEMBLY_PIECES = [
+    ("F_std", f_std_0, False),
+    ("F_ref", f_ref_0, False),
+    ("P", p_0, False),
+    ("Z", z_0, False),
+    ("V", v_0, False),
+    ("N_std_1", n_std_0, False),
+    ("N_std_2", n_std_0, False),
+    ("N_ref", n_ref_0, False),
+    ("L", l_0, False),
+    ("U", u_0, False),
+    ("W", w_0, False),
+    ("T", t_0, False),
+]
+
+
+def normalise(shape):
+    """Moves a shape so its top-most row and left-most column are 0, with
+    its squares in row-major order."""
+    min_i = min(i for i, _ in shape)
+    min_j = min(j for _, j in shape)
+    return tuple(sorted((i - min_i, j - min_j) for i, j in shape))
+
+
+def orientations(shape, reflect=False):
+    """Every distinct rotation of shape, plus every distinct reflection if
+    reflect is set, each normalised. Duplicates (the Z only has two
+    rotations, for example) are left out."""
+    found = []
+    flips = [shape, [(i, -j) for i, j in shape]] if reflect else [shape]
+    for flipped in flips:
+        turned = list(flipped)
+        for _ in range(4):
+            oriented = normalise(turned)
+            if (oriented not in found):
+                found.append(oriented)
+            turned = [(j, -i) for i, j in turned]
+    return found
+
+
+def shape_mask(shape):
+    """A normalised shape as a small bool array."""
+    mask = np.zeros((max(i for i, _ in shape) + 1,
+                     max(j for _, j in shape) + 1), dtype=bool)
+    for i, j in shape:
+        mask[i, j] = True
+    return mask
+
+
+def legal_offsets(board, shape):
+    """(i, j) offsets at which the normalised shape fits entirely on the
+    board, in row-major order. One sliding window view of the board is
+    checked against the shape mask for every offset at once."""
+    mask = shape_mask(shape)
+    if (mask.shape[0] > board.shape[0] or mask.shape[1] > board.shape[1]):
+        return np.empty((0, 2), dtype=np.intp)
+    windows = sliding_window_view(board, mask.shape)
+    fits = windows[..., mask].all(axis=-1)
+    return np.argwhere(fits)
+
+
+def generate_placements(board, shape, reflect=False):
+    """Every position of the piece on the board, as lists of (i, j)."""
+    board = np.asarray(board, dtype=bool)
+    positions = []
+    for oriented in orientations(shape, reflect):
+        cells = np.array(oriented)
+        for offset in legal_offsets(board, oriented):
+            positions.append([tuple(cell) for cell in
+                              (cells + offset).tolist()])
+    return positions
+
+
+def board_cells(board):
+    """The squares of a board array, in row-major order."""
+    return [tuple(cell) for cell in np.argwhere(np.asarray(board)).tolist()]
+
+
+def drop_dead_placements(board, positions, unit=5):
+    """Removes positions that, on their own on the empty board, already
+    wall off a region whose size isn't a multiple of unit (what
+    check_placement did, but checking every region and using bitboards)."""
+    cells = board_cells(board)
+    bits = cell_bits(cells)
+    neighbours = neighbour_masks(cells)
+    full = (1 << len(cells)) - 1
+    kept = []
+    for position in positions:
+        empty = full & ~placement_to_mask(position, bits)
+        alive = True
+        while empty and alive:
+            region = flood_fill(empty & -empty, empty, neighbours)
+            alive = region.bit_count() % unit == 0
+            empty &= ~region
+        if (alive):
+            kept.append(position)
+    return kept
+
+
+def build_matrix(board, pieces, trim_dead=True):
+    """The (name, [positions]) incidence matrix for the given board array
+    and list of (name, shape, may be reflected) pieces. With trim_dead set,
+    placements that can never be part of a solution because of the region
+    they cut off are left out, like create_moves_matrix does. Identical
+    pieces (same shape and reflect flag) share one position list."""
+    unit = len(pieces[0][1]) if pieces else 1
+    if (any(len(shape) != unit for _, shape, _ in pieces)):
+        unit = 1
+    cache = {}
+    matrix = []
+    for name, shape, reflect in pieces:
+        key = (normalise(shape), reflect)
+        if (key not in cache):
+            positions = generate_placements(board, shape, reflect)
+            if (trim_dead and unit > 1):
+                positions = drop_dead_placements(board, positions, unit)
+            cache[key] = positions
+        matrix.append((name, cache[key]))
+    return matrix
+
+
+def create_moves_matrix():
+    """Drop in replacement for assembly_jewels_matrixgen.create_moves_matrix.
+    It trims strictly more dead positions than that does: N_std_1 and
+    N_std_2 also lose [(9, 2), (9, 3), (10, 3), (10, 4), (10, 5)], which
+    can't be part of any solution. Every other position is the same, and so
+    are the 92 solutions."""
+    return build_matrix(ASSEMBLY_BOARD, ASSEMBLY_PIECES)
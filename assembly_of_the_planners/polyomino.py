@@ -0,0 +1,158 @@
+# General polyomino tiling, for boards other than the Assembly one: any
+# board shape (holes and all), any set of pieces, with duplicates, and
+# pieces that may or may not be flipped over. The exact cover matrix is
+# built by placements.build_matrix and solved with pent_solver, so the
+# symmetry breaking, pruning, stats and so on all work the same as they do
+# for Assembly of the Planners.
+# Boards are 2D arrays (or lists of strings, '#' for a square, anything
+# else for a hole). Pieces are (name, shape, may be reflected) like in
+# placements.ASSEMBLY_PIECES.
+
+import argparse
+
+import numpy as np
+
+from pent_solver import iter_solutions
+from placements import board_cells, build_matrix
+from solution_io import SolutionWriter
+from symmetry import expand_solutions
+
+# the 12 free pentominoes, by their usual letters.
+PENTOMINOES = {
+    "F": [(0, 1), (0, 2), (1, 0), (1, 1), (2, 1)],
+    "I": [(0, 0), (1, 0), (2, 0), (3, 0), (4, 0)],
+    "L": [(0, 0), (1, 0), (2, 0), (3, 0), (3, 1)],
+    "N": [(0, 1), (1, 1), (2, 0), (2, 1), (3, 0)],
+    "P": [(0, 0), (0, 1), (1, 0), (1, 1), (2, 0)],
+    "T": [(0, 0), (0, 1), (0, 2), (1, 1), (2, 1)],
+    "U": [(0, 0), (0, 2), (1, 0), (1, 1), (1, 2)],
+    "V": [(0, 0), (1, 0), (2, 0), (2, 1), (2, 2)],
+    "W": [(0, 0), (1, 0), (1, 1), (2, 1), (2, 2)],
+    "X": [(0, 1), (1, 0), (1, 1), (1, 2), (2, 1)],
+    "Y": [(0, 1), (1, 0), (1, 1), (2, 1), (3, 1)],
+    "Z": [(0, 0), (0, 1), (1, 1), (2, 1), (2, 2)],
+}
+
+
+def board_from_rows(rows):
+    """A board array from strings, '#' for a square and anything else
+    (usually '.') for a hole."""
+    width = max(len(row) for row in rows)
+    return np.array([[char == "#" for char in row.ljust(width)]
+                     for row in rows], dtype=bool)
+
+
+def rectangle(height, width, holes=()):
+    """A height x width board, with the (i, j) squares in holes left out."""
+    board = np.ones((height, width), dtype=bool)
+    for i, j in holes:
+        board[i, j] = False
+    return board
+
+
+def piece_set(counts, shapes=PENTOMINOES, reflect=True):
+    """Pieces for a multiset of shapes.
+
+    -- counts: {shape name: how many}, or just a list of shape names for
+        one of each.
+    -- shapes: shape name to list of squares.
+    -- reflect: whether pieces may be flipped over.
+
+    A shape used more than once gets numbered names (N_1, N_2, ...), which
+    the solver spots as interchangeable in canonical mode."""
+    if (not isinstance(counts, dict)):
+        counts = {name: 1 for name in counts}
+    pieces = []
+    for name, count in counts.items():
+        for n in range(count):
+            piece_name = name if count == 1 else "{0}_{1}".format(name, n + 1)
+            pieces.append((piece_name, shapes[name], reflect))
+    return pieces
+
+
+class TilingProblem:
+    """Covering a board exactly with a set of pieces, every piece used once.
+
+    -- board: 2D array, truthy for squares to cover (or a list of strings,
+        see board_from_rows).
+    -- pieces: list of (name, shape, may be reflected); names must be
+        unique.
+
+    Raises ValueError if the pieces don't add up to the board's area, since
+    then there is nothing to search."""
+
+    def __init__(self, board, pieces):
+        if (len(board) and isinstance(board[0], str)):
+            board = board_from_rows(board)
+        self.board = np.asarray(board, dtype=bool)
+        self.pieces = list(pieces)
+        names = [name for name, _, _ in self.pieces]
+        if (len(set(names)) != len(names)):
+            raise ValueError("piece names must be unique")
+        area = sum(len(shape) for _, shape, _ in self.pieces)
+        if (area != int(self.board.sum())):
+            raise ValueError("pieces cover {0} squares but the board has "
+                             "{1}".format(area, int(self.board.sum())))
+        self.matrix = build_matrix(self.board, self.pieces)
+
+    def solvable_squares(self):
+        """True if every square of the board is covered by at least one
+        position. The solver only knows about squares some position uses,
+        so without this it would happily leave the rest empty."""
+        used = set(square for _, positions in self.matrix
+                   for position in positions for square in position)
+        return used == set(board_cells(self.board))
+
+    def iter_solutions(self, canonical=False, checkpoint=None, prune=True,
+                       stats=None, decompose=False):
+        """Every tiling, as pent_solver.iter_solutions."""
+        if (not self.solvable_squares()):
+            return iter([])
+        return iter_solutions(self.matrix, canonical, checkpoint, prune,
+                              stats, decompose)
+
+    def solve(self, canonical=False, prune=True, stats=None, decompose=False):
+        """List of every tiling (one of each symmetric family if canonical),
+        each a list of (piece name, [(i, j)])."""
+        return list(self.iter_solutions(canonical, prune=prune, stats=stats,
+                                        decompose=decompose))
+
+    def expand(self, solutions):
+        """Yields every tiling from a list of canonical ones."""
+        return expand_solutions(solutions, self.matrix)
+
+
+# some standard pentomino puzzles, all with the 12 free pentominoes.
+BENCHMARKS = {
+    "6x10": lambda: rectangle(6, 10),
+    "5x12": lambda: rectangle(5, 12),
+    "4x15": lambda: rectangle(4, 15),
+    "3x20": lambda: rectangle(3, 20),
+    "8x8-2x2": lambda: rectangle(8, 8, [(3, 3), (3, 4), (4, 3), (4, 4)]),
+}
+
+
+if (__name__ == "__main__"):
+    parser = argparse.ArgumentParser(
+        description="Solves a standard pentomino tiling with the 12 free "
+                    "pentominoes.")
+    parser.add_argument("board", choices=sorted(BENCHMARKS),
+                        help="which board to tile")
+    parser.add_argument("--canonical", action="store_true",
+                        help="only one solution of each symmetric family "
+                             "(rotations and reflections of the board)")
+    parser.add_argument("--output", metavar="FILE",
+                        help="write every solution to FILE, one JSON line "
+                             "each")
+    args = parser.parse_args()
+
+    problem = TilingProblem(BENCHMARKS[args.board](),
+                            piece_set(list(PENTOMINOES)))
+    solutions = problem.iter_solutions(args.canonical)
+    if (args.output):
+        with SolutionWriter(args.output) as writer:
+            writer.write_all(solutions)
+        count = writer.count
+    else:
+        count = sum(1 for _ in solutions)
+    print("{0}: {1} solutions".format(args.board, count))
@@ -0,0 +1,63 @@
+# Dead region pruning while solving, i.e. the "demonstration three"
+# heuristic from Demonstrations.py done by the solver after every single
+# placement rather than only when generating the matrix: if the empty
+# squares get split up so that some walled off region can't be made up
+# exactly of pieces (for pentominoes, its size is not a multiple of 5),
+# nothing placed afterwards can fix it and the branch is dead.
+# Only regions touching the piece just placed can have changed, so only
+# those are flood filled, using the bitboards from bitboard.py.
+
+from functools import reduce
+from math import gcd
+
+from bitboard import flood_fill, neighbour_masks
+
+
+class RegionPruner:
+    """Checks placements for dead regions on one board.
+
+    -- cells: the squares the board's bits refer to.
+    -- compiled_pieces: the (name, [masks]) matrix, used to work out the
+        size every region has to be a multiple of (5 for pentominoes, or
+        in general the gcd of all the piece sizes).
+
+    pruned counts how many placements have been rejected, and checked how
+    many were looked at, to see how much the pruning is buying."""
+
+    def __init__(self, cells, compiled_pieces):
+        self.full = (1 << len(cells)) - 1
+        self.neighbours = neighbour_masks(cells)
+        self.unit = reduce(gcd, (mask.bit_count()
+                                 for _, masks in compiled_pieces
+                                 for mask in masks), 0) or 1
+        self.checked = 0
+        self.pruned = 0
+        self._around = {}
+
+    def around(self, mask):
+        """Every square next to (but not in) the given placement."""
+        ring = self._around.get(mask)
+        if (ring is None):
+            ring = 0
+            bits = mask
+            while bits:
+                low_bit = bits & -bits
+                bits ^= low_bit
+                ring |= self.neighbours[low_bit.bit_length() - 1]
+            ring &= ~mask
+            self._around[mask] = ring
+        return ring
+
+    def is_dead(self, board, mask):
+        """True if placing mask on board (which doesn't contain it yet)
+        leaves a region that can never be filled."""
+        self.checked += 1
+        empty = self.full & ~(board | mask)
+        seeds = self.around(mask) & empty
+        while seeds:
+            region = flood_fill(seeds & -seeds, empty, self.neighbours)
+            if (region.bit_count() % self.unit != 0):
+                self.pruned += 1
+                return True
+            seeds &= ~region
+        return False
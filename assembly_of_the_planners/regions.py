@@ -0,0 +1,96 @@
+# Splitting the search when the empty squares fall apart into separate
+# regions, the way the matrixgen header talks about the left side of the
+# Assembly board being solvable independently of the right.
+# Once the board is split, nothing placed in one region affects another
+# except through which pieces it uses up. So instead of carrying on with
+# one search over everything (which redoes the whole right side for every
+# way of filling the left), each region is tiled on its own:
+# - the smallest region is tiled every way it can be, using any of the
+#   remaining pieces, and the tilings are grouped by the set of pieces they
+#   use;
+# - for each of those piece sets the other regions are solved once, with
+#   the pieces that are left;
+# - every tiling in the group goes with every solution of the rest.
+
+from bitboard import flood_fill, neighbour_masks
+from symmetry import rows_in_order
+
+
+class RegionSplitter:
+    """Spots split boards and solves them region by region.
+
+    -- cells: the squares the board's bits refer to.
+    -- rows: row number to (piece name, mask), from build_columns.
+    -- Y: row number to its columns, from build_columns (the piece column
+        is the first).
+    -- siblings: rows of interchangeable pieces (see symmetry.sibling_rows)
+        for a canonical search, or None.
+
+    splits counts how many times a split board was solved this way."""
+
+    def __init__(self, cells, rows, Y, siblings=None):
+        self.full = (1 << len(cells)) - 1
+        self.neighbours = neighbour_masks(cells)
+        self.rows = rows
+        self.piece_of = {row: columns[0] for row, columns in Y.items()}
+        self.siblings = siblings
+        self.splits = 0
+
+    def regions(self, board):
+        """The empty regions of board, as masks, smallest first."""
+        empty = self.full & ~board
+        found = []
+        while (empty):
+            region = flood_fill(empty & -empty, empty, self.neighbours)
+            found.append(region)
+            empty &= ~region
+        found.sort(key=lambda region: (region.bit_count(), region))
+        return found
+
+    def solve(self, X, regions):
+        """Yields every way to finish the board, as lists of row numbers,
+        given the Algorithm X structure X for the current position and its
+        empty regions (at least two, from regions())."""
+        self.splits += 1
+        pieces = frozenset(column for column in X if column < 0)
+        # every row still available, looked up by the lowest square it
+        # covers, which is the square a region tiling always fills next.
+        by_low_bit = {}
+        for piece in pieces:
+            for row in X[piece]:
+                mask = self.rows[row][1]
+                by_low_bit.setdefault(mask & -mask, []).append(row)
+        for found in self._combine(regions, pieces, by_low_bit):
+            if (self.siblings is None or rows_in_order(found, self.siblings)):
+                yield found
+
+    def _combine(self, regions, pieces, by_low_bit):
+        if (not regions):
+            if (not pieces):
+                yield []
+            return
+        first, rest = regions[0], regions[1:]
+        by_pieces = {}
+        for tiling in self._tile(first, pieces, by_low_bit, []):
+            used = frozenset(self.piece_of[row] for row in tiling)
+            by_pieces.setdefault(used, []).append(tiling)
+        for used, tilings in by_pieces.items():
+            others = list(self._combine(rest, pieces - used, by_low_bit))
+            for tiling in tilings:
+                for other in others:
+                    yield tiling + other
+
+    def _tile(self, empty, pieces, by_low_bit, chosen):
+        """Every way to exactly cover the squares in empty with rows of
+        the given pieces, each piece at most once."""
+        if (not empty):
+            yield list(chosen)
+            return
+        for row in by_low_bit.get(empty & -empty, ()):
+            piece = self.piece_of[row]
+            mask = self.rows[row][1]
+            if (piece in pieces and mask & empty == mask):
+                chosen.append(row)
+                yield from self._tile(empty & ~mask, pieces - {piece},
+                                      by_low_bit, chosen)
+                chosen.pop()
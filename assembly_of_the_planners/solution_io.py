@@ -0,0 +1,76 @@
+# Solutions are written out one per line as JSON (JSON Lines), appended as
+# they are found, so a run that dies part way still leaves every solution it
+# got to on disk. Each line is a list of [piece name, [[i, j], ...]].
+
+import json
+import time
+
+
+class SolutionWriter:
+    """Appends solutions to a JSON Lines file, flushing every flush_every
+    solutions or flush_seconds seconds, whichever comes first. Use it as a
+    context manager so the last few solutions are flushed on the way out.
+    mode 'w' starts a fresh file, 'a' carries on from an existing one."""
+
+    def __init__(self, filename, mode='w', flush_every=10, flush_seconds=5):
+        self.file = open(filename, mode, encoding='utf8')
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.count = 0
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def write(self, solution):
+        self.file.write(json.dumps(solution) + "\n")
+        self.count += 1
+        self._unflushed += 1
+        if (self._unflushed >= self.flush_every or
+                time.monotonic() - self._last_flush >= self.flush_seconds):
+            self.flush()
+
+    def write_all(self, solutions):
+        for solution in solutions:
+            self.write(solution)
+
+    def flush(self):
+        self.file.flush()
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_solutions(filename):
+    """Yields the solutions in a JSON Lines file, one at a time, with the
+    squares turned back into (i, j) tuples. A half written last line (from
+    a run that was killed mid-write) is skipped."""
+    with open(filename, encoding='utf8') as file:
+        for line in file:
+            try:
+                solution = json.loads(line)
+            except ValueError:
+                continue
+            yield [(piece_name, [tuple(coord) for coord in position])
+                   for piece_name, position in solution]
+
+
+def truncate_solutions(filename, count):
+    """Cuts a JSON Lines solutions file back to its first count solutions,
+    used when resuming from a checkpoint taken after count solutions."""
+    with open(filename, 'r+b') as file:
+        kept = 0
+        while kept < count:
+            line = file.readline()
+            if (not line.endswith(b"\n")):
+                raise ValueError("{0} has fewer than {1} solutions".format(
+                    filename, count))
+            kept += 1
+        file.truncate(file.tell())
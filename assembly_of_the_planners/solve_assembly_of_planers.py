@@ -1,22 +1,116 @@
-from draw_solution import draw_solution
-from pent_solver import solve
-from assembly_jewels_matrixgen import create_moves_matrix
-import pprint
+from pent_solver import count, exists, iter_solutions
+from parallel_solver import solve_parallel
+from placements import ASSEMBLY_BOARD, ASSEMBLY_PIECES
+from matrix_cache import load_or_build
+from checkpoint import Checkpoint, matrix_key
+from solution_io import SolutionWriter, read_solutions, truncate_solutions
+import common_path  # puts common/ on the path, for search_stats
+from search_stats import SearchStats
+from svg_stream import SolutionRenderer
+from transposition import TranspositionTable
+import argparse
+from itertools import islice
 
 # Solves the assembly of the planners puzzle using a matrix that is
 # autogenerated
 
 output_file = "assembly_of_planners_solution.svg"
+# every solution goes in here as soon as it is found, just in case drawing
+# (or the search itself) totally fails.
+solutions_file = "assembly_of_planners_solutions.jsonl"
+checkpoint_file = "assembly_of_planners_checkpoint.json"
 
-full_matrix = create_moves_matrix()
+if (__name__ == "__main__"):
+    parser = argparse.ArgumentParser(
+        description="Finds and draws every solution to Assembly of the "
+                    "Planners.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of processes to search with; 0 means "
+                             "one per core (default: 1, no pool)")
+    parser.add_argument("--canonical", action="store_true",
+                        help="only keep one solution of each symmetric "
+                             "family, e.g. not both ways round for the two "
+                             "N_std pieces")
+    parser.add_argument("--no-prune", dest="prune", action="store_false",
+                        help="don't cut off branches that wall off a region "
+                             "no set of pieces can fill (to time how much "
+                             "that pruning saves)")
+    parser.add_argument("--checkpoint-interval", type=float, default=60,
+                        help="seconds between checkpoints of a single "
+                             "process search (default: 60)")
+    parser.add_argument("--resume", action="store_true",
+                        help="carry on from {0} instead of starting "
+                             "over".format(checkpoint_file))
+    parser.add_argument("--decompose", action="store_true",
+                        help="once the empty squares split into separate "
+                             "regions, solve each region on its own (single "
+                             "worker, no checkpoints)")
+    parser.add_argument("--first", type=int, metavar="K",
+                        help="stop after the first K solutions (single "
+                             "worker)")
+    parser.add_argument("--count", action="store_true",
+                        help="just print how many solutions there are, "
+                             "without finding or drawing them")
+    parser.add_argument("--exists", action="store_true",
+                        help="just print whether there is a solution")
+    parser.add_argument("--table-size", type=int, default=1000000,
+                        help="most positions --count remembers at once; 0 "
+                             "for no limit (default: 1000000)")
+    parser.add_argument("--stats", action="store_true",
+                        help="print nodes, pruned placements and time for "
+                             "each depth of the search afterwards")
+    args = parser.parse_args()
+    if (args.resume and args.workers != 1):
+        parser.error("--resume only works with a single worker")
+    if (args.stats and args.workers != 1):
+        parser.error("--stats only works with a single worker")
+    if (args.first is not None and args.workers != 1):
+        parser.error("--first only works with a single worker")
+    if (args.decompose and (args.workers != 1 or args.resume)):
+        parser.error("--decompose only works with a single worker and "
+                     "without --resume")
 
-all_solutions = solve(full_matrix)
+    # built the first time, then memory mapped from matrix_<key>.pmat, and
+    # handed to the solver as it is (see matrix_cache.CachedMatrix).
+    full_matrix = load_or_build(ASSEMBLY_BOARD, ASSEMBLY_PIECES)
 
-# just in case drawing totally fails
-data_printer = pprint.PrettyPrinter(indent=4)
-data = data_printer.pformat(all_solutions)
+    table = TranspositionTable(args.table_size or None)
+    if (args.count):
+        print("{0} solutions".format(count(full_matrix, args.canonical,
+                                           args.prune, table)))
+        print("Transposition table: {0}".format(table.report()))
+        raise SystemExit
+    if (args.exists):
+        print("Solvable" if exists(full_matrix, args.prune) else
+              "No solution")
+        raise SystemExit
 
-with open("emergency_solution_export.json", 'w') as file:
-    file.write(data)
+    if (args.workers == 1):
+        checkpoint = Checkpoint(checkpoint_file,
+                                matrix_key(full_matrix, args.canonical),
+                                args.checkpoint_interval)
+        mode = 'w'
+        if (args.resume and checkpoint.load()):
+            truncate_solutions(solutions_file, checkpoint.found)
+            mode = 'a'
+        with SolutionWriter(solutions_file, mode) as writer:
+            checkpoint.on_save = writer.flush
+            writer.count = checkpoint.found
+            stats = SearchStats() if args.stats else None
+            writer.write_all(islice(iter_solutions(
+                full_matrix, args.canonical,
+                None if args.decompose else checkpoint, args.prune, stats,
+                args.decompose), args.first))
+    else:
+        with SolutionWriter(solutions_file) as writer:
+            solve_parallel(full_matrix, args.workers or None,
+                           on_solutions=writer.write_all,
+                           canonical=args.canonical, prune=args.prune)
+    print("{0} solutions written to {1}".format(writer.count, solutions_file))
+    if (args.stats):
+        print(stats.report())
 
-draw_solution(all_solutions, output_file)
+    # streamed a solution at a time, so drawing all of them doesn't need
+    # them all in memory at once.
+    with SolutionRenderer(output_file, columns=10) as renderer:
+        renderer.write_all(read_solutions(solutions_file))
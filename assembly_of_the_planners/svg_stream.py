@@ -0,0 +1,241 @@
+# Streaming SVG output for large numbers of solutions. draw_solution builds
+# one svgwrite Drawing holding every solution and only writes it out at the
+# end; this writes each solution's SVG straight to the file as it comes in,
+# so memory stays the same however many there are, and it can keep up with
+# solutions coming straight out of the solver.
+# - The board's size and outline are worked out once, from the first
+#   solution, instead of the hard coded 9 x 14 tile spacing. The outline
+#   goes in <defs> and each solution just <use>s it.
+# - Solutions are laid out in a grid, columns wide. With per_page, a new
+#   file is started every per_page solutions (pages); without, everything
+#   goes in one big file (a contact sheet).
+# - Each piece in each of its positions is drawn as one filled and outlined
+#   <path>, worked out the first time that position turns up and kept, so
+#   later solutions with the piece in the same place just <use> it. A page
+#   gets the paths it needs in <defs> as it goes. There are only so many
+#   positions (a few thousand for Assembly), so the cache stays small,
+#   and a solution comes down to a dozen or so short <use>s.
+
+import argparse
+
+from draw_solution import COLOURS
+from solution_io import read_solutions
+
+
+class SolutionRenderer:
+    """Writes solutions to SVG as they come.
+
+    -- filename: file to write, or with per_page, a pattern with {0} for
+        the page number (e.g. "solutions_{0:03}.svg").
+    -- columns: solutions per row.
+    -- per_page: solutions per file, or None for all in one file.
+    -- size: width and height of each square.
+    -- padding: space round the edge of each page.
+    -- colour: function taking a piece name and returning its colour.
+    -- stroke_colour, stroke_width: for the lines between pieces.
+
+    Use it as a context manager so the last page is finished off. pages
+    lists the files written, count the number of solutions."""
+
+    def __init__(self, filename, columns=5, per_page=None, size=10,
+                 padding=5, colour=COLOURS.get, stroke_colour="black",
+                 stroke_width=2):
+        self.filename = filename
+        self.columns = columns
+        self.per_page = per_page
+        self.size = size
+        self.padding = padding
+        self.colour = colour
+        self.stroke_colour = stroke_colour
+        self.stroke_width = stroke_width
+        self.count = 0
+        self.pages = []
+        self.file = None
+        self._board = None
+        # (piece name, squares) -> (path id, path data)
+        self._shapes = {}
+
+    def _set_board(self, owner):
+        """Works out the board's bounds and outline from a solution."""
+        min_i = min(i for i, _ in owner)
+        min_j = min(j for _, j in owner)
+        self._origin = (min_i, min_j)
+        self._height = max(i for i, _ in owner) - min_i + 1
+        self._width = max(j for _, j in owner) - min_j + 1
+        self._board = self._polygon(owner)
+
+    def _start_page(self):
+        if (self.per_page is None):
+            name = self.filename
+            rows = None
+        else:
+            name = self.filename.format(len(self.pages) + 1)
+            rows = -(-self.per_page // self.columns)
+        self.pages.append(name)
+        self.file = open(name, 'w', encoding='utf8')
+        # each solution takes up its own width/height plus a square's gap.
+        self._cell_width = (self._width + 1) * self.size
+        self._cell_height = (self._height + 1) * self.size
+        if (rows is None):
+            # not known until the end
+            self.file.write('<svg xmlns="http://www.w3.org/2000/svg" '
+                            'xmlns:xlink="http://www.w3.org/1999/xlink" '
+                            'version="1.1" ')
+            # room for the size attributes, filled in by _end_page
+            self._size_at = self.file.tell()
+            self.file.write(" " * 80 + ">\n")
+        else:
+            self.file.write(
+                '<svg xmlns="http://www.w3.org/2000/svg" '
+                'xmlns:xlink="http://www.w3.org/1999/xlink" version="1.1" '
+                'width="{0}" height="{1}">\n'.format(
+                    2 * self.padding + self.columns * self._cell_width,
+                    2 * self.padding + rows * self._cell_height))
+        self.file.write('<defs><path id="board" fill="none" d="{0}"/></defs>\n'
+                        '<g stroke="{1}" stroke-width="{2}" '
+                        'stroke-linejoin="round" stroke-linecap="round">\n'
+                        .format(self._board, self.stroke_colour,
+                                self.stroke_width))
+        self._on_page = 0
+        # pieces' paths written to this page so far
+        self._defined = set()
+
+    def _end_page(self):
+        self.file.write("</g>\n</svg>\n")
+        if (self.per_page is None):
+            rows = max(1, -(-self._on_page // self.columns))
+            self.file.seek(self._size_at)
+            self.file.write('width="{0}" height="{1}"'.format(
+                2 * self.padding + self.columns * self._cell_width,
+                2 * self.padding + rows * self._cell_height))
+        self.file.close()
+        self.file = None
+
+    def _shape(self, name, squares):
+        """The id of the <path> for a piece in a placement, worked out the
+        first time it is seen, and written to the current page's <defs>
+        the first time it is used on that page."""
+        key = (name, frozenset(map(tuple, squares)))
+        shape = self._shapes.get(key)
+        if (shape is None):
+            shape = ("p{0}".format(len(self._shapes)),
+                     self._polygon(key[1]))
+            self._shapes[key] = shape
+        shape_id, d = shape
+        if (shape_id not in self._defined):
+            self._defined.add(shape_id)
+            self.file.write('<defs><path id="{0}" fill="{1}" d="{2}"/>'
+                            '</defs>\n'.format(
+                                shape_id, self.colour(name) or "white", d))
+        return shape_id
+
+    def _polygon(self, squares):
+        """SVG path data for the outline of a set of squares: the edges not
+        shared by two of them, joined up into loops, with straight runs
+        merged into one line."""
+        size = self.size
+        origin_i, origin_j = self._origin
+        # each square's edges, clockwise; an edge between two of the squares
+        # comes up once each way, and cancels out.
+        edges = set()
+        for i, j in squares:
+            corners = [(i, j), (i, j + 1), (i + 1, j + 1), (i + 1, j)]
+            for n in range(4):
+                edge = (corners[n], corners[(n + 1) % 4])
+                if ((edge[1], edge[0]) in edges):
+                    edges.remove((edge[1], edge[0]))
+                else:
+                    edges.add(edge)
+        following = {}
+        for start, end in edges:
+            following.setdefault(start, []).append(end)
+        loops = []
+        while (following):
+            start = min(following)
+            loop = [start]
+            at = start
+            while (True):
+                ends = following[at]
+                end = ends.pop()
+                if (not ends):
+                    del following[at]
+                if (end == start):
+                    break
+                loop.append(end)
+                at = end
+            loops.append(loop)
+        out = []
+        for loop in loops:
+            i, j = loop[0]
+            out.append("M{0} {1}".format((j - origin_j) * size,
+                                         (i - origin_i) * size))
+            # only the corners where the outline turns
+            for n in range(1, len(loop)):
+                (last_i, last_j), (i, j) = loop[n - 1], loop[n]
+                next_i, next_j = loop[(n + 1) % len(loop)]
+                if ((i - last_i, j - last_j) != (next_i - i, next_j - j)):
+                    out.append("L{0} {1}".format((j - origin_j) * size,
+                                                 (i - origin_i) * size))
+            out.append("Z")
+        return "".join(out)
+
+    def write(self, solution):
+        if (self._board is None):
+            self._set_board({tuple(square): name for name, squares in solution
+                             for square in squares})
+        if (self.file is None):
+            self._start_page()
+        row, column = divmod(self._on_page, self.columns)
+        out = ['<g transform="translate({0} {1})">'.format(
+            self.padding + column * self._cell_width,
+            self.padding + row * self._cell_height)]
+        for name, squares in solution:
+            out.append('<use xlink:href="#{0}"/>'.format(
+                self._shape(name, squares)))
+        out.append('<use xlink:href="#board"/></g>\n')
+        self.file.write("".join(out))
+        self.count += 1
+        self._on_page += 1
+        if (self.per_page is not None and self._on_page == self.per_page):
+            self._end_page()
+
+    def write_all(self, solutions):
+        for solution in solutions:
+            self.write(solution)
+
+    def close(self):
+        if (self.file is not None):
+            self._end_page()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if (__name__ == "__main__"):
+    parser = argparse.ArgumentParser(
+        description="Draws every solution in a JSON Lines file to SVG, a "
+                    "page at a time.")
+    parser.add_argument("solutions", help="JSON Lines file of solutions")
+    parser.add_argument("output",
+                        help="SVG file to write, or with --per-page a "
+                             "pattern with {0} for the page number")
+    parser.add_argument("--columns", type=int, default=10,
+                        help="solutions per row (default: 10)")
+    parser.add_argument("--per-page", type=int,
+                        help="solutions per file (default: all in one "
+                             "contact sheet)")
+    parser.add_argument("--size", type=int, default=10,
+                        help="size of each square (default: 10)")
+    args = parser.parse_args()
+    if (args.per_page is not None and "{0" not in args.output):
+        parser.error("output needs a {0} for the page number with "
+                     "--per-page")
+
+    with SolutionRenderer(args.output, args.columns, args.per_page,
+                          args.size) as renderer:
+        renderer.write_all(read_solutions(args.solutions))
+    print("{0} solutions drawn to {1} file(s)".format(renderer.count,
+                                                      len(renderer.pages)))
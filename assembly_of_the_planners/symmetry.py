@@ -0,0 +1,265 @@
+# Symmetry handling for the pentomino search, so the solver doesn't find the
+# same solution over and over in disguise. Two kinds of symmetry:
+# - interchangeable pieces: pieces given exactly the same position list,
+#   like N_std_1 and N_std_2. Any solution also works with the two swapped.
+#   These are broken by only allowing the first of the pieces the earlier
+#   position (in matrix order), the second the next one, and so on.
+# - board symmetries: rotations/reflections that map the board onto itself
+#   and every piece's positions onto some piece's positions (F_std and
+#   F_ref swap places under a reflection, for example). The Assembly board
+#   has none, but a 6x10 or 8x8 board has several.
+#   These are broken by keeping one piece to a single position out of each
+#   set of symmetric positions, then throwing away anything left over that
+#   is not the smallest of its symmetric copies.
+# expand_solutions takes canonical solutions back to the full set.
+
+from itertools import permutations
+
+# the eight rotations and reflections of a square grid.
+TRANSFORMS = [
+    ("identity", lambda i, j: (i, j)),
+    ("rotate_90", lambda i, j: (j, -i)),
+    ("rotate_180", lambda i, j: (-i, -j)),
+    ("rotate_270", lambda i, j: (-j, i)),
+    ("flip_rows", lambda i, j: (-i, j)),
+    ("flip_columns", lambda i, j: (i, -j)),
+    ("flip_diagonal", lambda i, j: (j, i)),
+    ("flip_antidiagonal", lambda i, j: (-j, -i)),
+]
+
+
+def identical_pieces(all_pieces):
+    """Groups of piece names (in matrix order) that have exactly the same
+    positions available, for example [['N_std_1', 'N_std_2']] for the
+    Assembly matrix. Pieces with no twin are left out."""
+    groups = {}
+    for piece_name, positions in all_pieces:
+        key = frozenset(frozenset(map(tuple, position))
+                        for position in positions)
+        groups.setdefault(key, []).append(piece_name)
+    return [names for names in groups.values() if len(names) > 1]
+
+
+def sibling_rows(all_pieces, groups):
+    """Lookup of matrix row number -> (columns of the group, slot in group,
+    position index) for every row belonging to an interchangeable piece.
+    Rows and piece columns are numbered the same way as
+    pent_solver.build_columns."""
+    columns = {piece_name: -(number + 1)
+               for number, (piece_name, _) in enumerate(all_pieces)}
+    slots = {piece_name: (tuple(columns[name] for name in names), slot)
+             for names in groups
+             for slot, piece_name in enumerate(names)}
+    siblings = {}
+    row = 0
+    for piece_name, positions in all_pieces:
+        for index in range(len(positions)):
+            if (piece_name in slots):
+                siblings[row] = slots[piece_name] + (index,)
+            row += 1
+    return siblings
+
+
+def out_of_order_rows(X, row, siblings):
+    """Once row is placed, the rows still in X for its twins that would put
+    the twins out of position order. The solver drops these, so that the
+    twins' columns only count the positions they can really still take."""
+    columns, slot, index = siblings[row]
+    dropped = []
+    for other_slot, column in enumerate(columns):
+        if (other_slot == slot or column not in X):
+            continue
+        for i in X[column]:
+            if ((other_slot < slot) != (siblings[i][2] < index)):
+                dropped.append(i)
+    return dropped
+
+
+def rows_in_order(chosen, siblings):
+    """True if the interchangeable pieces among the rows in chosen are in
+    position order, i.e. none of them would have been dropped by
+    out_of_order_rows had they been placed one by one."""
+    placed = {}
+    for row in chosen:
+        if (row in siblings):
+            columns, slot, index = siblings[row]
+            placed.setdefault(columns, []).append((slot, index))
+    for twins in placed.values():
+        twins.sort()
+        if (any(a[1] >= b[1] for a, b in zip(twins, twins[1:]))):
+            return False
+    return True
+
+
+def _cell_map(cells, transform):
+    moved = [transform(i, j) for i, j in cells]
+    shift_i = min(i for i, _ in cells) - min(i for i, _ in moved)
+    shift_j = min(j for _, j in cells) - min(j for _, j in moved)
+    mapping = {cell: (i + shift_i, j + shift_j)
+               for cell, (i, j) in zip(cells, moved)}
+    if (set(mapping.values()) != set(mapping)):
+        return None
+    return mapping
+
+
+def board_symmetries(all_pieces):
+    """Every rotation/reflection (other than the identity) that maps the
+    board onto itself and the matrix onto itself. Returns a list of
+    (transform name, square map, piece name map)."""
+    cells = sorted({tuple(coord)
+                    for _, positions in all_pieces
+                    for position in positions
+                    for coord in position})
+    position_sets = [(piece_name,
+                      frozenset(frozenset(map(tuple, position))
+                                for position in positions))
+                     for piece_name, positions in all_pieces]
+
+    symmetries = []
+    for transform_name, transform in TRANSFORMS[1:]:
+        mapping = _cell_map(cells, transform)
+        if (mapping is None):
+            continue
+        # each piece has to land on a piece with exactly the same positions,
+        # using up twins in order.
+        unused = list(position_sets)
+        piece_map = {}
+        for piece_name, positions in position_sets:
+            moved = frozenset(frozenset(mapping[coord] for coord in position)
+                              for position in positions)
+            target = next((other for other in unused if other[1] == moved),
+                          None)
+            if (target is None):
+                break
+            unused.remove(target)
+            piece_map[piece_name] = target[0]
+        else:
+            symmetries.append((transform_name, mapping, piece_map))
+    return symmetries
+
+
+def transform_solution(solution, symmetry):
+    """Applies one symmetry from board_symmetries to a solution."""
+    _, mapping, piece_map = symmetry
+    return [(piece_map[piece_name], sorted(mapping[tuple(coord)]
+                                           for coord in position))
+            for piece_name, position in solution]
+
+
+class Canonicaliser:
+    """Works out, for one matrix, which rows can be dropped and which found
+    solutions to keep so that only one solution of every symmetric family
+    comes out of the search."""
+
+    def __init__(self, all_pieces):
+        self.order = [piece_name for piece_name, _ in all_pieces]
+        self.groups = identical_pieces(all_pieces)
+        self.symmetries = board_symmetries(all_pieces)
+        self._index = {piece_name: {frozenset(map(tuple, position)): n
+                                    for n, position in enumerate(positions)}
+                       for piece_name, positions in all_pieces}
+
+        # the piece used to break board symmetry has to map to itself under
+        # every symmetry, so its positions split up into orbits. It must not
+        # have a twin either, as trimming it would stop them being twins.
+        twins = {piece_name for names in self.groups for piece_name in names}
+        self.anchor = None
+        self.kept = None
+        if (self.symmetries):
+            self.anchor = next(
+                (piece_name for piece_name in self.order
+                 if piece_name not in twins and
+                 all(piece_map[piece_name] == piece_name
+                     for _, _, piece_map in self.symmetries)), None)
+        if (self.anchor is not None):
+            self.kept = set()
+            positions = dict(all_pieces)[self.anchor]
+            for n, position in enumerate(positions):
+                orbit = [self._position_index(
+                    self.anchor, [mapping[tuple(c)] for c in position])
+                    for _, mapping, _ in self.symmetries]
+                if (n <= min(orbit)):
+                    self.kept.add(n)
+
+    def _position_index(self, piece_name, position):
+        return self._index[piece_name][frozenset(map(tuple, position))]
+
+    def trim_matrix(self, all_pieces):
+        """The matrix with the anchor piece cut down to one position per
+        orbit. Row numbers in the result differ from all_pieces, so
+        siblings should be recomputed with sibling_rows on the result."""
+        if (self.kept is None):
+            return all_pieces
+        return [(piece_name,
+                 [position for n, position in enumerate(positions)
+                  if n in self.kept]
+                 if piece_name == self.anchor else positions)
+                for piece_name, positions in all_pieces]
+
+    def normalise(self, solution):
+        """Sorts a solution into matrix piece order, with interchangeable
+        pieces swapped around so they are in position order."""
+        placed = dict((piece_name, position)
+                      for piece_name, position in solution)
+        for names in self.groups:
+            positions = sorted((placed[piece_name] for piece_name in names),
+                               key=lambda p: self._position_index(names[0],
+                                                                  p))
+            placed.update(zip(names, positions))
+        return [(piece_name, sorted(map(tuple, placed[piece_name])))
+                for piece_name in self.order if piece_name in placed]
+
+    def is_canonical(self, solution):
+        """True if the solution is the one to keep out of its symmetric
+        copies. Only symmetries that keep the anchor piece where it is are
+        checked, as the trimmed matrix never lets it go anywhere else."""
+        if (not self.symmetries):
+            return True
+        key = self.normalise(solution)
+        anchor_at = dict(key).get(self.anchor)
+        for symmetry in self.symmetries:
+            image = self.normalise(transform_solution(solution, symmetry))
+            if (self.anchor is not None and
+                    dict(image)[self.anchor] != anchor_at):
+                continue
+            if (image < key):
+                return False
+        return True
+
+    def expand(self, solution):
+        """Every distinct solution that is symmetric to the given one,
+        including itself."""
+        images = [solution] + [transform_solution(solution, symmetry)
+                               for symmetry in self.symmetries]
+        seen = set()
+        for image in images:
+            placed = dict(image)
+            for swaps in _group_permutations(self.groups):
+                renamed = dict(placed)
+                for names, order in zip(self.groups, swaps):
+                    for piece_name, source in zip(names, order):
+                        renamed[piece_name] = placed[source]
+                full = [(piece_name, sorted(map(tuple, renamed[piece_name])))
+                        for piece_name in self.order if piece_name in renamed]
+                key = tuple((piece_name, tuple(position))
+                            for piece_name, position in full)
+                if (key not in seen):
+                    seen.add(key)
+                    yield full
+
+
+def _group_permutations(groups):
+    if (not groups):
+        yield []
+        return
+    for order in permutations(groups[0]):
+        for rest in _group_permutations(groups[1:]):
+            yield [order] + rest
+
+
+def expand_solutions(solutions, all_pieces):
+    """Takes canonical solutions (from pent_solver with canonical=True) back
+    to the full set of solutions, one at a time."""
+    canonicaliser = Canonicaliser(all_pieces)
+    for solution in solutions:
+        yield from canonicaliser.expand(solution)
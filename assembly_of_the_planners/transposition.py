@@ -0,0 +1,144 @@
+# Transposition table for counting (and existence) searches. Placing the
+# same pieces in a different order often gets to the same position: the
+# same squares covered and the same pieces left. Everything below that
+# position is the same search, so the number of ways to finish it is worked
+# out once, stored under (covered squares, pieces left) and looked up the
+# next time.
+# Pieces that are exactly alike (N_std_1 and N_std_2) count as the same
+# piece in the key, so "N_std_1 left" and "N_std_2 left" share an entry.
+# This only works for counting: to list solutions every one of them has to
+# be walked anyway. It also counts every solution, like a non canonical
+# search; the interchangeable pieces' ordering would have to be part of the
+# key otherwise.
+
+from collections import OrderedDict
+
+from pent_solver import build_columns, choose_column, deselect, prepare, \
+    select
+from pruning import RegionPruner
+
+
+class TranspositionTable:
+    """Completion counts by (board mask, pieces left), with the least
+    recently used entries thrown out once there are more than max_entries
+    (None for no limit).
+
+    hits, misses and evictions count lookups that found an entry, ones that
+    didn't, and entries thrown out."""
+
+    def __init__(self, max_entries=1000000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """The stored count for key, or None."""
+        count = self.entries.get(key)
+        if (count is None):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return count
+
+    def put(self, key, count):
+        self.entries[key] = count
+        self.entries.move_to_end(key)
+        if (self.max_entries is not None and
+                len(self.entries) > self.max_entries):
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def report(self):
+        return ("{0} entries, {1} hits, {2} misses ({3:.1%} hit rate), {4} "
+                "evictions".format(len(self.entries), self.hits, self.misses,
+                                   self.hit_rate(), self.evictions))
+
+
+def piece_kinds(compiled):
+    """For each piece in a (name, [masks]) matrix, the index of the first
+    piece with exactly the same positions (itself if it has no twin)."""
+    first = {}
+    return [first.setdefault(frozenset(masks), n)
+            for n, (_, masks) in enumerate(compiled)]
+
+
+class CountingSearch:
+    """Counts solutions of a (name, [positions]) matrix, or a
+    matrix_cache.CachedMatrix, with a transposition table.
+
+    -- table: the TranspositionTable to use (a fresh one with the default
+        size limit if None). It can be shared between searches of the same
+        matrix, or given no limit with TranspositionTable(None).
+    -- prune: whether to skip placements that wall off a dead region, as
+        pent_solver does.
+
+    The search itself is pent_solver's: the same Algorithm X structures,
+    branching on the column with the fewest rows left. The number of ways
+    to finish only depends on the squares covered and how many of each kind
+    of piece are left (which alike piece is which makes no difference), so
+    that is all the key needs."""
+
+    def __init__(self, all_pieces, table=None, prune=True):
+        self.table = table if table is not None else TranspositionTable()
+        self.cells, compiled, _, _ = prepare(all_pieces, False)
+        self.pruner = RegionPruner(self.cells, compiled) if prune else None
+        self.X, self.Y, self.rows = build_columns(compiled)
+        kinds = piece_kinds(compiled)
+        self.kind_names = sorted(set(kinds))
+        slot = {kind: n for n, kind in enumerate(self.kind_names)}
+        # row number -> kind slot of its piece
+        self.kind_of = [slot[kinds[-self.Y[row][0] - 1]]
+                        for row in range(len(self.rows))]
+        self.start = [0] * len(self.kind_names)
+        for kind in kinds:
+            self.start[slot[kind]] += 1
+        self.start = tuple(self.start)
+
+    def count(self, stop_at=None):
+        """Number of solutions. With stop_at, stops looking once at least
+        that many are found (so stop_at=1 answers "is there one?")."""
+        return self._count(0, self.start, stop_at)
+
+    def _count(self, board, left, stop_at):
+        X = self.X
+        if (not X):
+            return 1
+        key = (board, left)
+        found = self.table.get(key)
+        if (found is not None):
+            return found
+        total = 0
+        for row in sorted(X[choose_column(X)]):
+            mask = self.rows[row][1]
+            if (self.pruner is not None and
+                    self.pruner.is_dead(board, mask)):
+                continue
+            kind = self.kind_of[row]
+            now_left = left[:kind] + (left[kind] - 1,) + left[kind + 1:]
+            removed = select(X, self.Y, row)
+            total += self._count(board | mask, now_left, stop_at)
+            deselect(X, self.Y, row, removed)
+            if (stop_at is not None and total >= stop_at):
+                # not the full count, so it can't be stored
+                return total
+        self.table.put(key, total)
+        return total
+
+
+def count_solutions(all_pieces, table=None, prune=True):
+    """Number of solutions of the matrix (every one, as pent_solver.solve
+    without canonical would list). Pass a TranspositionTable to change its
+    size limit or to look at its hit rate afterwards."""
+    return CountingSearch(all_pieces, table, prune).count()
+
+
+def has_solution(all_pieces, table=None, prune=True):
+    """True if the matrix has at least one solution."""
+    return CountingSearch(all_pieces, table, prune).count(stop_at=1) > 0
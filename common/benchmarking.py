@@ -0,0 +1,104 @@
+# Timing fixed workloads, for each puzzle's benchmark.py. Each workload is
+# run a few times and the fastest time kept, then run once more under
+# tracemalloc for its peak memory. Results are printed as JSON, and can be
+# saved as (or compared against) a baseline file, so a change that makes
+# something slower shows up straight away.
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+BASELINE_FILE = "benchmark_baseline.json"
+
+
+def measure(run, repeat):
+    """Fastest of repeat runs in seconds, and the peak memory (in KiB) of
+    one more run traced by tracemalloc."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        taken = time.perf_counter() - start
+        if (best is None or taken < best):
+            best = taken
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(best, 6), "peak_kib": round(peak / 1024, 1)}
+
+
+def compare(results, baseline, tolerance):
+    """Prints each workload against the baseline. Returns the names of those
+    that got more than tolerance (a fraction) slower or bigger."""
+    regressions = []
+    width = max(map(len, results), default=0)
+    for name, result in results.items():
+        old = baseline.get(name)
+        if (old is None):
+            print("{0:{1}} new".format(name, width))
+            continue
+        time_ratio = result["seconds"] / old["seconds"] if old["seconds"] \
+            else 1.0
+        memory_ratio = result["peak_kib"] / old["peak_kib"] if \
+            old["peak_kib"] else 1.0
+        worse = time_ratio > 1 + tolerance or memory_ratio > 1 + tolerance
+        print("{0:{1}} time x{2:.2f}  memory x{3:.2f}{4}".format(
+            name, width, time_ratio, memory_ratio,
+            "  REGRESSION" if worse else ""))
+        if (worse):
+            regressions.append(name)
+    return regressions
+
+
+def main(description, workloads, full_help):
+    """The command line for a benchmark.py.
+
+    -- description: for --help.
+    -- workloads: function taking full (whether to include the slow ones)
+        and returning (name, setup) pairs, where setup does any untimed
+        preparation and returns the function to time.
+    -- full_help: --help text for --full, saying what it adds."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs per workload, fastest kept (default: 3)")
+    parser.add_argument("--full", action="store_true", help=full_help)
+    parser.add_argument("--only", nargs="*", metavar="NAME",
+                        help="just these workloads")
+    parser.add_argument("--output", help="write the results JSON here too")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store the results as the new {0}".format(
+                            BASELINE_FILE))
+    parser.add_argument("--compare", action="store_true",
+                        help="compare against {0}; exits with 1 if anything "
+                             "regressed".format(BASELINE_FILE))
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="how much slower (or bigger) counts as a "
+                             "regression, as a fraction (default: 0.2)")
+    args = parser.parse_args()
+
+    results = {}
+    chosen = [(name, setup) for name, setup in workloads(args.full)
+              if not args.only or name in args.only]
+    width = max((len(name) for name, _ in chosen), default=0)
+    for name, setup in chosen:
+        results[name] = measure(setup(), args.repeat)
+        print("{0:{1}} {2[seconds]:10.4f}s {2[peak_kib]:12.1f} KiB".format(
+            name, width, results[name]), file=sys.stderr)
+    print(json.dumps(results, indent=2))
+    if (args.output):
+        with open(args.output, 'w', encoding='utf8') as file:
+            json.dump(results, file, indent=2)
+    if (args.save_baseline):
+        with open(BASELINE_FILE, 'w', encoding='utf8') as file:
+            json.dump(results, file, indent=2)
+            file.write("\n")
+    if (args.compare):
+        with open(BASELINE_FILE, encoding='utf8') as file:
+            baseline = json.load(file)
+        if (compare(results, baseline, args.tolerance)):
+            sys.exit(1)
@@ -0,0 +1,94 @@
+# Opt-in instrumentation for a backtracking search: how many nodes are
+# visited at each depth, how many choices were cut off there without being
+# searched, how long the subtrees at each depth took and how fast solutions
+# come out. With no stats a solver only pays for an "is not None" check per
+# node.
+# Shared by both puzzles (see common_path.py in each):
+# - pent_solver.iter_solutions / solve take one as stats. Depth is the
+#   number of pieces placed so far, and pruned counts placements the dead
+#   region pruner threw out.
+# - SeventhMountainSolver takes one as stats. Depth is the solve step, and
+#   pruned counts digits thrown out for breaking a line.
+
+import time
+
+
+class SearchStats:
+    """Counts and times a search, one entry per depth.
+
+    -- on_event: optional function called as on_event(event, depth) for
+        every "node" entered, "pruned" choice and "solution" found, for
+        tracing a search as it goes.
+    -- depth_label: what to call a depth in report ("depth", "step").
+
+    nodes[d] is the number of nodes at depth d, pruned[d] the choices cut
+    off at depth d (never searched, so they aren't in nodes[d + 1]) and
+    time[d] the total seconds spent in subtrees rooted at depth d, including
+    whatever the consumer of a generator search did in between solutions.
+    Stats keep adding up over several searches."""
+
+    def __init__(self, on_event=None, depth_label="depth"):
+        self.on_event = on_event
+        self.depth_label = depth_label
+        self.nodes = []
+        self.pruned = []
+        self.time = []
+        self.solutions = 0
+        self.started = None
+        self.stopped = None
+        self._entered = []
+
+    def enter(self, depth):
+        """A node at depth is being searched."""
+        now = time.perf_counter()
+        if (self.started is None):
+            self.started = now
+        while (len(self.nodes) <= depth):
+            self.nodes.append(0)
+            self.pruned.append(0)
+            self.time.append(0.0)
+        self.nodes[depth] += 1
+        self._entered.append(now)
+        if (self.on_event is not None):
+            self.on_event("node", depth)
+
+    def leave(self, depth):
+        """The node at depth (the last one entered) is finished."""
+        now = time.perf_counter()
+        self.time[depth] += now - self._entered.pop()
+        self.stopped = now
+
+    def prune(self, depth):
+        """A choice at depth was cut off without searching it."""
+        self.pruned[depth] += 1
+        if (self.on_event is not None):
+            self.on_event("pruned", depth)
+
+    def solution(self, depth):
+        """A solution was found at depth."""
+        self.solutions += 1
+        if (self.on_event is not None):
+            self.on_event("solution", depth)
+
+    def elapsed(self):
+        """Seconds from the first node to the last one finished."""
+        if (self.started is None or self.stopped is None):
+            return 0.0
+        return self.stopped - self.started
+
+    def solutions_per_second(self):
+        elapsed = self.elapsed()
+        return self.solutions / elapsed if elapsed else 0.0
+
+    def report(self):
+        """The stats as a printable table."""
+        lines = ["{0:>5}      nodes     pruned    time (s)".format(
+            self.depth_label)]
+        for depth, nodes in enumerate(self.nodes):
+            lines.append("{0:5} {1:10} {2:10} {3:11.3f}".format(
+                depth, nodes, self.pruned[depth], self.time[depth]))
+        lines.append("{0} nodes, {1} solutions in {2:.2f}s ({3:.1f} "
+                     "solutions/s)".format(sum(self.nodes), self.solutions,
+                                           self.elapsed(),
+                                           self.solutions_per_second()))
+        return "\n".join(lines)
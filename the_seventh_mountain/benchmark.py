@@ -0,0 +1,47 @@
+# Fixed workloads for timing the Seventh Mountain solvers, instead of
+# comparing unseeded random runs. The timing, baseline and command line are
+# in common/benchmarking.py, shared with the Assembly benchmark.
+# Every workload is deterministic: fixed seeds, so the same searches on
+# every run.
+
+import common_path  # puts common/ on the path, for benchmarking
+from benchmarking import main
+from seventh_count import SolutionCounter
+from seventh_order import best_order
+from seventh_solver import GOOD_ORDER, GOOD_VALIDATE, SeventhMountainSolver
+
+
+def workloads(full=False):
+    """(name, setup) pairs. setup does any untimed preparation and returns
+    the function to time."""
+    def seeded_trials():
+        def run():
+            solver = SeventhMountainSolver(GOOD_ORDER, GOOD_VALIDATE, seed=0)
+            for _ in range(100):
+                solver.solve()
+        return run
+
+    def in_order():
+        solver = SeventhMountainSolver(GOOD_ORDER, GOOD_VALIDATE,
+                                       randomise=False)
+        return solver.solve
+
+    def derive_order():
+        return best_order
+
+    def count_all():
+        return lambda: SolutionCounter().count()
+
+    found = [
+        ("seeded_trials_100", seeded_trials),
+        ("in_order", in_order),
+        ("derive_order", derive_order),
+    ]
+    if (full):
+        found.append(("count_all", count_all))
+    return found
+
+
+if (__name__ == "__main__"):
+    main("Times fixed Seventh Mountain workloads.", workloads,
+         "also time counting every solution (several seconds a run)")
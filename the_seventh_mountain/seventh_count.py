@@ -0,0 +1,108 @@
+# Counts (and lists) every solution to Panditah of the Seventh Mountain,
+# rather than stopping at the first one like the other scripts.
+# Cells are filled in a fixed order. At any point, everything that matters
+# for how many ways the rest of the board can be finished is:
+# - how many of each tile are left (which also says how far along we are)
+# - the value mod 7 of each line so far (finished lines are all 0)
+# so the number of completions is memoised on exactly that, and any two
+# partial boards that agree on it share one count. Listing solutions walks
+# the same tree, but never goes into a branch whose count is 0.
+
+import argparse
+import sys
+
+from seventh_lines import CELL_COUNT, CELL_LINES, LINES, lines_finished_by_step
+
+# same as the main solver: closes lines early, which keeps the number of
+# distinct residues (and so the memo) small.
+COUNT_ORDER = [0, 9, 16, 17, 15, 19, 18, 4, 10,
+    8, 14, 1, 2, 3, 5, 11, 7, 13, 6, 12]
+
+
+class SolutionCounter:
+    """Counts completions of the board, filling cells in order.
+
+    -- order: the order to fill the cells in; any order gives the same
+        answers, but ones that finish lines early are much faster.
+    -- tiles: how many of each digit 0-9 there are (two of each)."""
+
+    def __init__(self, order=COUNT_ORDER, tiles=(2,) * 10):
+        self.order = list(order)
+        self.tiles = tuple(tiles)
+        self.finished = lines_finished_by_step(self.order)
+        self.memo = {}
+
+    def count(self, step=0, tiles=None, residues=None):
+        """Number of ways to finish the board from step on, given the tiles
+        left and line residues at that point (default: empty board)."""
+        if (tiles is None):
+            tiles = self.tiles
+        if (residues is None):
+            residues = (0,) * len(LINES)
+        if (step == len(self.order)):
+            return 1
+        # step is implied by how many tiles are left, so it isn't in the key
+        key = (tiles, residues)
+        total = self.memo.get(key)
+        if (total is None):
+            total = 0
+            for digit, left, new_tiles, new_residues in self._moves(
+                    step, tiles, residues):
+                total += self.count(step + 1, new_tiles, new_residues)
+            self.memo[key] = total
+        return total
+
+    def _moves(self, step, tiles, residues):
+        """Every digit that can go in this step's cell without breaking a
+        line it finishes, with the tiles and residues afterwards."""
+        cell = self.order[step]
+        for digit in range(10):
+            left = tiles[digit]
+            if (left == 0):
+                continue
+            new_residues = list(residues)
+            for line, weight in CELL_LINES[cell]:
+                new_residues[line] = (new_residues[line] + weight * digit) % 7
+            if (any(new_residues[line] for line in self.finished[step])):
+                continue
+            new_tiles = tiles[:digit] + (left - 1,) + tiles[digit + 1:]
+            yield digit, left, new_tiles, tuple(new_residues)
+
+    def solutions(self):
+        """Yields every solution as a list of 20 digits, board[cell]."""
+        board = [None] * CELL_COUNT
+        yield from self._solutions(0, self.tiles, (0,) * len(LINES), board)
+
+    def _solutions(self, step, tiles, residues, board):
+        if (step == len(self.order)):
+            yield list(board)
+            return
+        cell = self.order[step]
+        for digit, _, new_tiles, new_residues in self._moves(
+                step, tiles, residues):
+            if (self.count(step + 1, new_tiles, new_residues) == 0):
+                continue
+            board[cell] = digit
+            yield from self._solutions(step + 1, new_tiles, new_residues,
+                                       board)
+        board[cell] = None
+
+
+if (__name__ == "__main__"):
+    parser = argparse.ArgumentParser(
+        description="Counts every solution to Panditah of the Seventh "
+                    "Mountain.")
+    parser.add_argument("--list", metavar="FILE",
+                        help="also write every solution to FILE, one per "
+                             "line as 20 digits in board order")
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 1000))
+    counter = SolutionCounter()
+    total = counter.count()
+    print("Number of solutions: {0}".format(total))
+    print("Distinct states counted: {0}".format(len(counter.memo)))
+    if (args.list):
+        with open(args.list, 'w', encoding='utf8') as file:
+            for solution in counter.solutions():
+                file.write("".join(str(digit) for digit in solution) + "\n")
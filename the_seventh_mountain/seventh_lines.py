@@ -0,0 +1,142 @@
+# The line structure of the Panditah of the Seventh Mountain board, for
+# checking the divisible by 7 rule incrementally instead of rebuilding all
+# 13 numbers with is_valid_board on every step.
+#            | 0|
+#         | 1| 2| 3|
+#      | 4| 5| 6| 7| 8|
+#   | 9|10|11|12|13|14|15|
+#   |16|17|        |18|19|
+# A number is divisible by 7 exactly when the sum of its digits, each
+# multiplied by (10 ** place) mod 7, is. So every line just keeps that sum
+# mod 7 as digits are placed and taken off again, and a finished line is
+# valid when its sum is 0.
+
+# the 13 rows/columns, most significant digit first (the same numbers
+# is_valid_board reads).
+LINES = [
+    # rows
+    (0,),
+    (1, 2, 3),
+    (4, 5, 6, 7, 8),
+    (9, 10, 11, 12, 13, 14, 15),
+    (16, 17),
+    (18, 19),
+    # columns
+    (9, 16),
+    (15, 19),
+    (4, 10, 17),
+    (8, 14, 18),
+    (1, 5, 11),
+    (3, 7, 13),
+    (0, 2, 6, 12),
+]
+
+CELL_COUNT = 20
+
+
+def cell_lines(lines=LINES):
+    """For each cell, the (line, weight) pairs of every line it is in, with
+    the weight being (10 ** place) mod 7 for its place in that line."""
+    found = [[] for _ in range(CELL_COUNT)]
+    for line, cells in enumerate(lines):
+        for place_value, cell in enumerate(reversed(cells)):
+            found[cell].append((line, pow(10, place_value, 7)))
+    return found
+
+
+CELL_LINES = cell_lines()
+
+
+def line_weights(lines=LINES):
+    """For each line, {cell: weight} for every cell in it."""
+    return [{cell: pow(10, place_value, 7)
+             for place_value, cell in enumerate(reversed(cells))}
+            for cells in lines]
+
+
+LINE_WEIGHTS = line_weights()
+
+
+def closing_digits(lines=LINES):
+    """For each line, {cell: table}, where table[residue] is the set of
+    digits that, put in cell as the last one on the line when the rest of
+    it adds up to residue, make the line divisible by 7. Finishing a line
+    is then a lookup."""
+    return [{cell: [frozenset(digit for digit in range(10)
+                              if (residue + weight * digit) % 7 == 0)
+                    for residue in range(7)]
+             for cell, weight in weights.items()}
+            for weights in line_weights(lines)]
+
+
+# built once when first imported, and shared by every solver in the process
+CLOSING_DIGITS = closing_digits()
+
+
+def place(residues, cell, digit):
+    """Adds digit at cell to the running residues (one per line)."""
+    for line, weight in CELL_LINES[cell]:
+        residues[line] = (residues[line] + weight * digit) % 7
+
+
+def unplace(residues, cell, digit):
+    """Takes digit at cell back off the running residues."""
+    for line, weight in CELL_LINES[cell]:
+        residues[line] = (residues[line] - weight * digit) % 7
+
+
+def lines_valid(residues, lines):
+    """True if every one of the given (finished) lines is divisible by 7."""
+    for line in lines:
+        if (residues[line] != 0):
+            return False
+    return True
+
+
+def lines_finished_by_step(solve_order, first_step=0):
+    """For each step of solve_order, the lines whose last cell is placed at
+    that step. Cells placed before first_step (set up by hand before
+    solving starts) count as finished at first_step."""
+    step_of = {cell: max(step, first_step)
+               for step, cell in enumerate(solve_order)}
+    finished = [[] for _ in solve_order]
+    for line, cells in enumerate(LINES):
+        finished[max(step_of[cell] for cell in cells)].append(line)
+    return finished
+
+
+def closing_checks(solve_order, check_lines):
+    """Splits the lines to check at each step (from lines_to_check) into
+    the ones the step's own cell finishes, as (line, table) pairs from
+    CLOSING_DIGITS to look the digit up in before it's placed, and the rest
+    (finished at earlier, unvalidated steps, or by presets), which still
+    have to be checked from the residues."""
+    closing = []
+    others = []
+    for step, lines in enumerate(check_lines):
+        # a line being checked at this step that the step's cell is on can
+        # only have been finished by it.
+        cell = solve_order[step]
+        closing.append([(line, CLOSING_DIGITS[line][cell]) for line in lines
+                        if cell in LINE_WEIGHTS[line]])
+        others.append([line for line in lines
+                       if cell not in LINE_WEIGHTS[line]])
+    return closing, others
+
+
+def lines_to_check(solve_order, validate_for_step, first_step=0):
+    """For each step, the lines that need checking if the step is one that
+    gets validated: everything finished since the last validated step. This
+    rejects exactly what is_valid_board would at the same steps, since
+    lines that were already checked can't have changed since."""
+    finished = lines_finished_by_step(solve_order, first_step)
+    to_check = []
+    pending = []
+    for step in range(len(solve_order)):
+        pending = pending + finished[step]
+        if (validate_for_step[step]):
+            to_check.append(pending)
+            pending = []
+        else:
+            to_check.append([])
+    return to_check
@@ -0,0 +1,114 @@
+# Works out a solve order for Panditah of the Seventh Mountain from the line
+# structure, instead of by hand, along with the steps that need validating
+# and an estimate of how big the search tree is for any order.
+# - A step only needs validating if it finishes a line (every other step
+#   just placed a guess).
+# - The estimate treats every finished line as having a 1 in 7 chance of
+#   being divisible by 7. The number of partial boards after k steps is then
+#   about (ways to lay k tiles from two of each digit) / 7 ** (lines finished
+#   by step k), and the tree size is the sum of that over every step. It
+#   isn't exact, but it ranks orders the same way the backtracking counts
+#   do, and costs nothing to work out.
+# - The order itself comes from a beam search over which cells have been
+#   placed so far, keeping the ones with the smallest estimate at each step.
+
+import argparse
+from fractions import Fraction
+from math import factorial
+
+from seventh_lines import CELL_COUNT, CELL_LINES, LINES, lines_finished_by_step
+
+
+def validation_mask(solve_order):
+    """For each step, True if it finishes a line and so needs validating."""
+    return [len(lines) > 0 for lines in lines_finished_by_step(solve_order)]
+
+
+def _arrangements(tiles=(2,) * 10):
+    """For each k, how many ordered ways there are to lay k tiles from the
+    given counts of each digit."""
+    # k! times the x^k coefficient of the product of sum(x^n / n!)
+    poly = [Fraction(1)]
+    for count in tiles:
+        term = [Fraction(1, factorial(n)) for n in range(count + 1)]
+        product = [Fraction(0)] * (len(poly) + len(term) - 1)
+        for a, x in enumerate(poly):
+            for b, y in enumerate(term):
+                product[a + b] += x * y
+        poly = product
+    return [int(coefficient * factorial(k))
+            for k, coefficient in enumerate(poly)]
+
+
+ARRANGEMENTS = _arrangements()
+
+
+def level_sizes(solve_order):
+    """Estimated number of partial boards that survive validation after
+    each step of solve_order."""
+    sizes = []
+    closed = 0
+    for step, lines in enumerate(lines_finished_by_step(solve_order)):
+        closed += len(lines)
+        sizes.append(ARRANGEMENTS[step + 1] / 7 ** closed)
+    return sizes
+
+
+def tree_size(solve_order):
+    """Estimated number of nodes the full search tree has for solve_order."""
+    return sum(level_sizes(solve_order))
+
+
+def best_order(width=1000):
+    """The order with the smallest estimated tree that a beam search finds,
+    and its validation mask.
+
+    -- width: how many sets of placed cells to keep at each step. The
+        estimate only depends on which cells are placed, not their order, so
+        keeping every set would give the best order there is; 1000 already
+        finds it."""
+    line_masks = [sum(1 << cell for cell in cells) for cells in LINES]
+    # placed cells (as a bitmask) -> (estimate so far, order, lines finished)
+    beam = {0: (0, [], 0)}
+    for step in range(CELL_COUNT):
+        expanded = {}
+        for placed, (size, order, closed) in beam.items():
+            for cell in range(CELL_COUNT):
+                if (placed >> cell & 1):
+                    continue
+                now_placed = placed | 1 << cell
+                now_closed = closed + sum(
+                    1 for line, _ in CELL_LINES[cell]
+                    if line_masks[line] & now_placed == line_masks[line])
+                now_size = size + ARRANGEMENTS[step + 1] / 7 ** now_closed
+                if (now_placed not in expanded or
+                        now_size < expanded[now_placed][0]):
+                    expanded[now_placed] = (now_size, order + [cell],
+                                            now_closed)
+        beam = dict(sorted(expanded.items(),
+                           key=lambda item: item[1][0])[:width])
+    _, order, _ = min(beam.values())
+    return order, validation_mask(order)
+
+
+if (__name__ == "__main__"):
+    from seventh_solver import ORDERS
+
+    parser = argparse.ArgumentParser(
+        description="Derives a solve order for Panditah of the Seventh "
+                    "Mountain and compares it with the hand made ones.")
+    parser.add_argument("--levels", action="store_true",
+                        help="also print the estimated size of each level")
+    args = parser.parse_args()
+
+    orders = [(name, order) for name, (order, _) in sorted(ORDERS.items())]
+    derived, mask = best_order()
+    orders.append(("derived", derived))
+    for name, order in orders:
+        print("{0}: {1}".format(name, order))
+        print("  estimated search tree: {0:,.0f} nodes".format(
+            tree_size(order)))
+        if (args.levels):
+            print("  " + " ".join("{0:.3g}".format(size)
+                                  for size in level_sizes(order)))
+    print("derived validation mask: {0}".format(mask))
@@ -0,0 +1,379 @@
+# One solver for Panditah of the Seventh Mountain, in place of the three
+# copy-pasted scripts. Everything that used to differ between them (the
+# solve order, which steps get validated, how many runs, where the stats
+# go) is a parameter now, and the search state lives on a solver object
+# instead of in globals, so several orders can be run side by side in one
+# process.
+#            | 0|
+#         | 1| 2| 3|
+#      | 4| 5| 6| 7| 8|
+#   | 9|10|11|12|13|14|15|
+#   |16|17|        |18|19|
+# The old scripts are still there, as thin wrappers round this.
+
+import argparse
+import csv
+import random
+from itertools import product
+
+from seventh_lines import CELL_COUNT, CLOSING_DIGITS, LINE_WEIGHTS, LINES, \
+    closing_checks, lines_to_check, lines_valid, place, unplace
+from seventh_order import best_order
+import common_path  # puts common/ on the path, for search_stats
+from search_stats import SearchStats
+
+# solves the single cells and short lines first, so that most guesses get
+# checked straight away.
+GOOD_ORDER = [0, 9, 16, 17, 15, 19, 18, 4, 10,
+    8, 14, 1, 2, 3, 5, 11, 7, 13, 6, 12]
+# minor optimisation: No need to validate a step of solving if that step
+# placed a tile that is in a 'guess' position and didn't generate a full
+# value somewhere that needs verification.
+GOOD_VALIDATE = [True, False, True, True, False, True, True,
+    False, True, False, True, False, False, True, False, True, False,
+    True, True, True]
+
+# the worst order (solve the hardest first), to show how much the order
+# matters.
+HARDEST_ORDER = [9, 10, 11, 12, 13, 14, 15, 4, 5,
+    6, 7, 8, 1, 2, 3, 16, 17, 18, 19, 0]
+HARDEST_VALIDATE = [False, False, False, False, False, False, True,
+    False, False, False, False, True, True, False, True, True, True,
+    True, True, True]
+
+# lines with more empty cells than this are left alone by forward checking:
+# there are too many ways to fill them to go through, and with 10 digits to
+# choose from there is nearly always one that works.
+PROPAGATE_CELLS = 3
+
+ORDERS = {
+    "good": (GOOD_ORDER, GOOD_VALIDATE),
+    "hardest": (HARDEST_ORDER, HARDEST_VALIDATE),
+}
+
+
+class SeventhMountainSolver:
+    """Backtracking solver that places one tile per step, in solve_order.
+
+    -- solve_order: the 20 cells, in the order to fill them.
+    -- validate_for_step: for each step, whether to check the board after
+        it. Steps that don't finish a line can skip it. Default: every step.
+    -- seed: seed for the order digits are tried in. None picks one at
+        random, like the old scripts.
+    -- randomise: try digits in a random order (to replicate a human
+        choosing a number that works, which we don't necessarily do in order
+        0-9). False tries them 0-9.
+    -- on_place: called as on_place(step, cell, digit) for every digit put
+        down that passed validation.
+    -- on_backtrack: called as on_backtrack(step, cell, digit) whenever a
+        placed digit has to be taken back off.
+    -- stats: optional search_stats.SearchStats to count and time every
+        step of the search with.
+    -- forward_check: keep track of which digits each empty cell can still
+        take (see _propagate), only try those, and back up as soon as some
+        empty cell has none left, instead of finding out when a line is
+        finished. Off by default, since the point of the stats runs is to
+        count the backtracks of a human going by the validated steps.
+
+    After solve, backtracking_cnt is the number of backtracks the run took
+    and furthest_backtrack the earliest step (1 based) it had to back up to.
+    20 was a perfect run."""
+
+    def __init__(self, solve_order=GOOD_ORDER, validate_for_step=None,
+                 seed=None, randomise=True, on_place=None, on_backtrack=None,
+                 stats=None, forward_check=False):
+        if (sorted(solve_order) != list(range(CELL_COUNT))):
+            raise ValueError("solve_order must have every cell exactly once")
+        self.solve_order = list(solve_order)
+        if (validate_for_step is None):
+            validate_for_step = [True] * CELL_COUNT
+        self.validate_for_step = list(validate_for_step)
+        self.random = random.Random(seed)
+        self.randomise = randomise
+        self.on_place = on_place
+        self.on_backtrack = on_backtrack
+        self.stats = stats
+        self.forward_check = forward_check
+        # which digits can finish each line closed at each step, looked up
+        # from the tables in seventh_lines (see closing_checks). Worked out
+        # once here for solving without presets, and reused by every solve.
+        self.closing, self.check_lines = self._checks(0)
+        self.backtracking_cnt = 0
+        self.furthest_backtrack = CELL_COUNT
+
+    def solve(self, presets=None):
+        """Finds a solution and returns the board, a list of 20 digits, or
+        None if there isn't one.
+
+        -- presets: {cell: digit} to put down before solving starts. These
+            must be the first cells of the solve order, and use up their
+            tiles like any other."""
+        presets = presets or {}
+        first_step = len(presets)
+        if (set(presets) != set(self.solve_order[:first_step])):
+            raise ValueError("presets must be the first cells of the solve "
+                             "order")
+        # index refers to numerical value of tile. Array value refers to how
+        # many left
+        self.tiles = [2] * 10
+        # drawing of board in validate functions
+        self.board = ["."] * CELL_COUNT
+        # running value mod 7 of every line, see seventh_lines.py
+        self.residues = [0] * len(LINES)
+        self.backtracking_cnt = 0
+        self.furthest_backtrack = CELL_COUNT
+        for cell, digit in presets.items():
+            if (self.tiles[digit] == 0):
+                raise ValueError("not enough {0} tiles".format(digit))
+            self.board[cell] = digit
+            self.tiles[digit] -= 1
+            place(self.residues, cell, digit)
+        if (first_step != self._checks_from):
+            self.closing, self.check_lines = self._checks(first_step)
+        domains = None
+        if (self.forward_check):
+            domains = self._propagate()
+            if (domains is None):
+                return None
+        if (first_step == CELL_COUNT or
+                self._solve_board(first_step, domains)):
+            return list(self.board)
+        return None
+
+    def _checks(self, first_step):
+        """The lines to check at each validated step; only the ones that
+        have been finished since the last validated step can have gone
+        wrong. Split into the ones finished by the step's cell, with their
+        closing digit tables, and the rest."""
+        self._checks_from = first_step
+        return closing_checks(self.solve_order,
+                              lines_to_check(self.solve_order,
+                                             self.validate_for_step,
+                                             first_step))
+
+    def digits(self):
+        """The order to try the digits in for one step."""
+        if (self.randomise):
+            shuffled = list(range(0, 10))
+            self.random.shuffle(shuffled)
+            return shuffled
+        return range(0, 10)
+
+    def _propagate(self):
+        """The digits each empty cell can still take, as {cell: set of
+        digits}, or None if some cell has none left.
+
+        Every cell starts with the digits that have a tile left. Then each
+        line with only a few empty cells (up to PROPAGATE_CELLS) is gone
+        through, keeping only digits that some way of filling the rest of
+        the line (from their own remaining digits, without using more tiles
+        than there are) makes divisible by 7. A cell losing digits can take
+        digits away from the other lines it is on, so this goes round until
+        nothing changes."""
+        board = self.board
+        tiles = self.tiles
+        residues = self.residues
+        available = {digit for digit in range(10) if tiles[digit]}
+        domains = {cell: set(available) for cell in range(CELL_COUNT)
+                   if board[cell] == "."}
+        lines = [(line, [(cell, LINE_WEIGHTS[line][cell]) for cell in cells
+                         if board[cell] == "."])
+                 for line, cells in enumerate(LINES)]
+        lines = [(line, empty) for line, empty in lines
+                 if 0 < len(empty) <= PROPAGATE_CELLS]
+        changed = True
+        while (changed):
+            changed = False
+            for line, empty in lines:
+                supported = [set() for _ in empty]
+                (last, _), rest = empty[-1], empty[:-1]
+                closing = CLOSING_DIGITS[line][last]
+                # every way to fill all but the last cell, with the digits
+                # that would finish the line from there looked up.
+                for digits in product(*(domains[cell] for cell, _ in rest)):
+                    residue = (residues[line] + sum(
+                        weight * digit for (_, weight), digit
+                        in zip(rest, digits))) % 7
+                    for digit in closing[residue] & domains[last]:
+                        used = digits + (digit,)
+                        if (len(used) > 1 and any(
+                                used.count(tile) > tiles[tile]
+                                for tile in used)):
+                            continue
+                        for n, tile in enumerate(used):
+                            supported[n].add(tile)
+                for (cell, _), digits in zip(empty, supported):
+                    if (not digits):
+                        return None
+                    if (digits != domains[cell]):
+                        domains[cell] = digits
+                        changed = True
+        return domains
+
+    def _solve_board(self, step, domains=None):
+        """Solves the next step of the board. Each step of the board will try
+        to place a tile into one particular place, which will either solve
+        one row/column to a multiple of 7, or end up just being a guess. True
+        once a total solution is found (at the last step), with the board
+        left filled in.
+
+        -- domains: when forward checking, what _propagate gave for the
+            board as it stands, worked out by the step before."""
+        board = self.board
+        tiles = self.tiles
+        residues = self.residues
+        stats = self.stats
+        current_space = self.solve_order[step]
+        last_step = step == CELL_COUNT - 1
+        if (stats is not None):
+            stats.enter(step)
+        # the digits that finish the lines this cell closes, if it closes
+        # any and this step is validated.
+        allowed = None
+        if (self.validate_for_step[step]):
+            for line, closing in self.closing[step]:
+                digits = closing[residues[line]]
+                allowed = digits if allowed is None else allowed & digits
+        domain = None
+        if (domains is not None):
+            domain = domains[current_space]
+
+        for i in self.digits():
+            # sanity check: we can't place a tile if we used them all up
+            if (tiles[i] == 0):
+                continue
+            if (domain is not None and i not in domain):
+                if (stats is not None):
+                    stats.prune(step)
+                continue
+
+            if (allowed is not None and i not in allowed):
+                if (stats is not None):
+                    stats.prune(step)
+                continue
+
+            board[current_space] = i
+            place(residues, current_space, i)
+            # validation is skipped for certain spaces.
+            if (self.validate_for_step[step] and self.check_lines[step] and
+                    not lines_valid(residues, self.check_lines[step])):
+                unplace(residues, current_space, i)
+                board[current_space] = "."
+                if (stats is not None):
+                    stats.prune(step)
+                continue
+            tiles[i] -= 1
+            # worked out here, and handed to the next step as they are.
+            child_domains = None
+            if (domain is not None and not last_step):
+                child_domains = self._propagate()
+                if (child_domains is None):
+                    # some empty cell can't be filled any more, so this
+                    # digit is out without going any further.
+                    tiles[i] += 1
+                    unplace(residues, current_space, i)
+                    board[current_space] = "."
+                    if (stats is not None):
+                        stats.prune(step)
+                    continue
+            if (self.on_place):
+                self.on_place(step, current_space, i)
+
+            if (last_step or self._solve_board(step + 1, child_domains)):
+                if (stats is not None):
+                    if (last_step):
+                        stats.solution(step)
+                    stats.leave(step)
+                return True
+            # we returned from the solution branches, if any. If we hit here,
+            # it means a backtrack. The tile is now available again.
+            self.backtracking_cnt += 1
+            if (self.furthest_backtrack > step + 1):
+                self.furthest_backtrack = step + 1
+            if (self.on_backtrack):
+                self.on_backtrack(step, current_space, i)
+            tiles[i] += 1
+            unplace(residues, current_space, i)
+            board[current_space] = "."
+
+        if (stats is not None):
+            stats.leave(step)
+        return False
+
+
+def run_trials(solver, trials, filename, presets=None):
+    """Solves trials times with the same solver (so one seed covers the
+    whole run), writing each run's backtracking total and furthest
+    backtrack to the csv file filename."""
+    with open(filename, 'w', encoding='utf8', newline='') as stats_file:
+        stats_writer = csv.writer(stats_file)
+        stats_writer.writerow(['Backtracking Total', 'Furthest Backtrack'])
+        for _ in range(0, trials):
+            solver.solve(presets)
+            stats_writer.writerow([solver.backtracking_cnt,
+                                   solver.furthest_backtrack])
+
+
+def pretty_print(board):
+    print("""
+           |{0}|
+         |{1}|{2}|{3}|
+       |{4}|{5}|{6}|{7}|{8}|
+     |{9}|{10}|{11}|{12}|{13}|{14}|{15}|
+     |{16}|{17}|     |{18}|{19}|""".format(*board))
+
+
+if (__name__ == "__main__"):
+    parser = argparse.ArgumentParser(
+        description="Solves Panditah of the Seventh Mountain.")
+    parser.add_argument("--order", choices=sorted(ORDERS) + ["derived"],
+                        default="good",
+                        help="which solve order to use; derived works one "
+                             "out with seventh_order.py (default: good)")
+    parser.add_argument("--seed", type=int,
+                        help="seed for the random digit order, so runs can "
+                             "be repeated")
+    parser.add_argument("--in-order", dest="randomise", action="store_false",
+                        help="try digits 0-9 in order instead of randomly")
+    parser.add_argument("--top", type=int, choices=[0, 7],
+                        help="put this tile in the top cell first (only with "
+                             "the good order, where it is solved first)")
+    parser.add_argument("--trials", type=int, default=1,
+                        help="number of runs; more than one writes stats to "
+                             "--csv instead of printing the board")
+    parser.add_argument("--csv", default="7th_mountain_run.csv",
+                        help="where to write the stats of a multiple run "
+                             "(default: 7th_mountain_run.csv)")
+    parser.add_argument("--stats", action="store_true",
+                        help="print nodes, rejected digits and time for each "
+                             "step afterwards (added up over every trial)")
+    parser.add_argument("--forward-check", action="store_true",
+                        help="only try digits every line can still be "
+                             "finished with, and back up as soon as some "
+                             "empty cell has none")
+    args = parser.parse_args()
+    if (args.trials < 1):
+        parser.error("--trials needs to be at least 1")
+
+    if (args.order == "derived"):
+        order, validate = best_order()
+    else:
+        order, validate = ORDERS[args.order]
+    stats = SearchStats(depth_label="step") if args.stats else None
+    solver = SeventhMountainSolver(order, validate, args.seed, args.randomise,
+                                   stats=stats,
+                                   forward_check=args.forward_check)
+    presets = None
+    if (args.top is not None):
+        if (order[0] != 0):
+            parser.error("--top needs an order that solves the top cell "
+                         "first")
+        presets = {0: args.top}
+    if (args.trials == 1):
+        pretty_print(solver.solve(presets))
+        print("Number of backtrackings required: {0}".format(
+            solver.backtracking_cnt))
+    else:
+        run_trials(solver, args.trials, args.csv, presets)
+    if (stats is not None):
+        print(stats.report())
@@ -0,0 +1,154 @@
+# Runs lots of randomised solves of Panditah of the Seventh Mountain (what
+# 7th_jewels_of_the_oracle_stat.py does) over a pool of processes, and sums
+# the results up.
+# Every trial gets its own seed, worked out from the master seed and the
+# trial's number, so a trial always makes the same choices no matter which
+# process runs it or in what order. Rows are written in trial order as they
+# come back, so the csv for a given seed is the same byte for byte however
+# many workers there are.
+
+import argparse
+import csv
+import hashlib
+import os
+import statistics
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from seventh_order import best_order
+from seventh_solver import ORDERS, SeventhMountainSolver
+
+# set up in each worker process by _init_worker.
+_worker_solver = None
+
+
+def trial_seed(master_seed, trial):
+    """The seed for trial number trial of a run seeded with master_seed."""
+    digest = hashlib.sha256("{0}:{1}".format(master_seed, trial)
+                            .encode('utf8')).digest()
+    return int.from_bytes(digest[:8], 'little')
+
+
+def _init_worker(solve_order, validate_for_step, forward_check=False):
+    global _worker_solver
+    _worker_solver = SeventhMountainSolver(solve_order, validate_for_step,
+                                           forward_check=forward_check)
+
+
+def _run_trial(job):
+    trial, seed = job
+    _worker_solver.random.seed(seed)
+    _worker_solver.solve()
+    return (trial, seed, _worker_solver.backtracking_cnt,
+            _worker_solver.furthest_backtrack)
+
+
+def run_trials(trials, master_seed=0, workers=1, solve_order=None,
+               validate_for_step=None, on_result=None, forward_check=False):
+    """Runs trials solves and returns the (trial, seed, backtracking total,
+    furthest backtrack) of each, in trial order.
+
+    -- workers: number of processes; 1 runs them here with no pool, None
+        means one per core.
+    -- solve_order, validate_for_step: as for SeventhMountainSolver, the
+        good order by default.
+    -- on_result: optional function called with each result, in trial
+        order, as soon as it (and every trial before it) is done.
+    -- forward_check: as for SeventhMountainSolver."""
+    if (solve_order is None):
+        solve_order, validate_for_step = ORDERS["good"]
+    if (workers is None):
+        workers = os.cpu_count() or 1
+    jobs = [(trial, trial_seed(master_seed, trial))
+            for trial in range(trials)]
+    results = []
+
+    def collect(outcomes):
+        for result in outcomes:
+            results.append(result)
+            if (on_result is not None):
+                on_result(result)
+
+    if (workers == 1):
+        _init_worker(solve_order, validate_for_step, forward_check)
+        collect(map(_run_trial, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(solve_order, validate_for_step,
+                                           forward_check)) as pool:
+            # map hands results back in the order of jobs
+            collect(pool.map(_run_trial, jobs,
+                             chunksize=max(1, trials // (workers * 16))))
+    return results
+
+
+def percentile(ordered, percent):
+    """Nearest rank percentile of an already sorted list."""
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[rank - 1]
+
+
+def summarise(results):
+    """Summary statistics of a list of trial results, as a dict."""
+    backtracks = sorted(result[2] for result in results)
+    return {
+        "trials": len(results),
+        "mean": statistics.mean(backtracks),
+        "median": statistics.median(backtracks),
+        "p90": percentile(backtracks, 90),
+        "p99": percentile(backtracks, 99),
+        "max": backtracks[-1],
+        "furthest_backtrack": dict(sorted(Counter(
+            result[3] for result in results).items())),
+    }
+
+
+def print_summary(summary):
+    print("Trials: {0}".format(summary["trials"]))
+    print("Backtracks: mean {0:.1f}, median {1:g}, 90% {2}, 99% {3}, "
+          "max {4}".format(summary["mean"], summary["median"],
+                           summary["p90"], summary["p99"], summary["max"]))
+    print("Furthest backtrack (step: runs):")
+    most = max(summary["furthest_backtrack"].values())
+    for step, count in summary["furthest_backtrack"].items():
+        print("  {0:2}: {1:6} {2}".format(step, count,
+                                          "#" * max(1, 50 * count // most)))
+
+
+if (__name__ == "__main__"):
+    parser = argparse.ArgumentParser(
+        description="Runs randomised solves of Panditah of the Seventh "
+                    "Mountain over several processes and sums them up.")
+    parser.add_argument("--trials", type=int, default=10000,
+                        help="number of solves (default: 10000)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="master seed every trial's seed comes from "
+                             "(default: 0)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="number of processes; 0 means one per core "
+                             "(default: 0)")
+    parser.add_argument("--order", choices=sorted(ORDERS) + ["derived"],
+                        default="good",
+                        help="which solve order to use (default: good)")
+    parser.add_argument("--csv", default="7th_mountain_run.csv",
+                        help="where to write every trial "
+                             "(default: 7th_mountain_run.csv)")
+    parser.add_argument("--forward-check", action="store_true",
+                        help="solve with forward checking (see "
+                             "seventh_solver.py)")
+    args = parser.parse_args()
+    if (args.trials < 1):
+        parser.error("--trials needs to be at least 1")
+
+    if (args.order == "derived"):
+        order, validate = best_order()
+    else:
+        order, validate = ORDERS[args.order]
+    with open(args.csv, 'w', encoding='utf8', newline='') as stats_file:
+        stats_writer = csv.writer(stats_file)
+        stats_writer.writerow(['Trial', 'Seed', 'Backtracking Total',
+                               'Furthest Backtrack'])
+        results = run_trials(args.trials, args.seed, args.workers or None,
+                             order, validate, stats_writer.writerow,
+                             args.forward_check)
+    print_summary(summarise(results))